@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+# Copied from scripts/router.py by generate-from-config.py; edit that file instead.
+
+"""
+router.py - Latency-aware OpenAI-compatible router in front of the per-model llama-server Services
+
+Routes each request by its ``model`` field to the replicas of that model and
+picks the replica with the lowest (in-flight + 1) x latency EWMA score. Keeps a
+keep-alive connection pool per replica, health-checks /health, and fails over
+to another replica when a backend errors before the response has started.
+
+Models with ``prefix_hash`` routing instead send requests whose prompts start
+the same way to the same replica (consistent hashing with bounded load), so
+llama-server's prompt cache (--cache-reuse) is hit. Prometheus metrics,
+including the cached share of prompt tokens, are served on /metrics.
+
+The route table (routes.json) is generated from models.yaml by
+generate-from-config.py. Uses only the Python standard library.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import math
+import random
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+# Response headers that describe the hop, not the payload; the router sets its own
+_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'proxy-connection'}
+# Request headers passed through to the backend
+_FORWARD_HEADERS = ('authorization', 'accept', 'content-type', 'user-agent', 'x-request-id')
+_RETRYABLE_STATUS = {502, 503, 504}
+_EWMA_ALPHA = 0.3
+ROUTING_MODES = ('least_latency', 'prefix_hash')
+# Virtual nodes per replica on the hash ring; more gives a more even key spread
+_RING_VNODES = 64
+# Largest non-streamed response body inspected for token usage
+_MAX_USAGE_BODY = 4 * 1024 * 1024
+# Upper bounds (seconds) of the time-to-first-token histogram
+_TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+
+class BackendError(Exception):
+    """A replica failed before any response bytes reached the client."""
+
+
+@dataclass(slots=True)
+class Routing:
+    """Per-model routing settings (the ``routing`` block of a model in models.yaml)."""
+
+    mode: str = 'least_latency'
+    # Characters of the prompt (system prompt first) that select the replica
+    prefix_chars: int = 1024
+    # A replica takes at most load_factor x the average in-flight requests before keys spill over
+    load_factor: float = 1.25
+
+
+@dataclass(slots=True)
+class RouterOptions:
+    retries: int = 2
+    connect_timeout: float = 5.0
+    timeout: float = 600.0
+    health_interval: float = 5.0
+    resolve_interval: float = 15.0
+    eject_seconds: float = 5.0
+    max_idle: int = 16
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1 framing
+# ---------------------------------------------------------------------------
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[str, Dict[str, str]]:
+    """Read a request/status line and headers; raises IncompleteReadError on EOF."""
+    start = await reader.readline()
+    if not start:
+        raise asyncio.IncompleteReadError(b"", None)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n"):
+            break
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return start.decode('latin-1').rstrip('\r\n'), headers
+
+
+async def iter_body(reader: asyncio.StreamReader, headers: Dict[str, str],
+                    until_eof: bool = False) -> AsyncIterator[bytes]:
+    """Yield a message body by chunked framing, Content-Length, or (responses only) connection close."""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif 'content-length' in headers:
+        remaining = int(headers['content-length'])
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                raise asyncio.IncompleteReadError(data, remaining)
+            remaining -= len(data)
+            yield data
+    elif until_eof:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+
+def keep_alive(headers: Dict[str, str], version: str = 'HTTP/1.1') -> bool:
+    connection = headers.get('connection', '').lower()
+    return connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+
+# ---------------------------------------------------------------------------
+# Replicas and models
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class Replica:
+    model: str
+    address: str
+    port: int
+    in_flight: int = 0
+    ewma_ms: Optional[float] = None
+    healthy: bool = True
+    failures: int = 0
+    ejected_until: float = 0.0
+    requests: int = 0
+    idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.address}:{self.port}"
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def score(self, unseen_ms: float) -> float:
+        """Expected wait: requests ahead of us (plus ours) times observed latency."""
+        return (self.in_flight + 1) * (self.ewma_ms if self.ewma_ms is not None else unseen_ms)
+
+    def observe(self, elapsed_ms: float):
+        self.ewma_ms = elapsed_ms if self.ewma_ms is None else \
+            _EWMA_ALPHA * elapsed_ms + (1 - _EWMA_ALPHA) * self.ewma_ms
+        self.failures = 0
+
+    def fail(self, eject_seconds: float):
+        """Take the replica out of rotation with exponential backoff (capped at a minute)."""
+        self.failures += 1
+        self.ejected_until = time.monotonic() + min(eject_seconds * 2 ** (self.failures - 1), 60.0)
+        self.close_idle()
+
+    async def acquire(self, connect_timeout: float) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Return a pooled connection if one is still open, else a new one; the flag says it was pooled."""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.address, self.port), connect_timeout)
+        return reader, writer, False
+
+    def release(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reusable: bool, max_idle: int):
+        if reusable and len(self.idle) < max_idle and not writer.is_closing():
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close_idle(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+@dataclass(slots=True)
+class ModelStats:
+    prefix_owner: int = 0
+    prefix_spilled: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    # Streamed responses only; per-bucket (not cumulative) counts
+    ttft_buckets: List[int] = field(default_factory=lambda: [0] * len(_TTFT_BUCKETS))
+    ttft_sum: float = 0.0
+    ttft_count: int = 0
+
+    def observe_ttft(self, seconds: float):
+        for i, bound in enumerate(_TTFT_BUCKETS):
+            if seconds <= bound:
+                self.ttft_buckets[i] += 1
+                break
+        self.ttft_sum += seconds
+        self.ttft_count += 1
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+class HashRing:
+    """Consistent-hash ring over a set of replicas, with virtual nodes for an even spread."""
+
+    def __init__(self, replicas: List[Replica]):
+        points = sorted((_hash(f"{replica.key}#{i}"), replica.key, i, replica)
+                        for replica in replicas for i in range(_RING_VNODES))
+        self._hashes = [point[0] for point in points]
+        self._replicas = [point[3] for point in points]
+
+    def walk(self, key: int) -> Iterator[Replica]:
+        """Yield each distinct replica clockwise from ``key``; the first is the key's owner."""
+        start = bisect.bisect(self._hashes, key)
+        seen = set()
+        for i in range(len(self._replicas)):
+            replica = self._replicas[(start + i) % len(self._replicas)]
+            if replica.key not in seen:
+                seen.add(replica.key)
+                yield replica
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+
+def prompt_prefix(request: Dict[str, Any], chars: int) -> str:
+    """Leading ``chars`` characters of a chat or completion prompt, roles included.
+
+    Chat requests that open with system messages are keyed on those alone, so
+    a short system prompt followed by varying user turns still maps to one key.
+    """
+    if isinstance(request.get('messages'), list):
+        messages = [m for m in request['messages'] if isinstance(m, dict)]
+        system = []
+        for message in messages:
+            if message.get('role') not in ('system', 'developer'):
+                break
+            system.append(message)
+        parts: List[str] = []
+        length = 0
+        for message in system or messages:
+            content = message.get('content') or ''
+            if isinstance(content, list):
+                content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+            parts.append(f"{message.get('role', '')}:{content}\n")
+            length += len(parts[-1])
+            if length >= chars:
+                break
+        text = ''.join(parts)
+    else:
+        prompt = request.get('prompt', '')
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt)
+    return text[:chars]
+
+
+def usage_counts(payload: Any) -> Optional[Tuple[int, int]]:
+    """(prompt tokens, of which served from cache) from a llama-server response or stream event."""
+    if not isinstance(payload, dict):
+        return None
+    timings = payload.get('timings')
+    if isinstance(timings, dict) and 'prompt_n' in timings:
+        # llama-server: prompt_n tokens were evaluated, cache_n came from the slot's cache
+        cached = int(timings.get('cache_n', 0))
+        return int(timings['prompt_n']) + cached, cached
+    usage = payload.get('usage')
+    if isinstance(usage, dict) and 'prompt_tokens' in usage:
+        details = usage.get('prompt_tokens_details') or {}
+        return int(usage['prompt_tokens']), int(details.get('cached_tokens', 0))
+    return None
+
+
+class UsageScanner:
+    """Pick token usage out of a proxied response without holding on to streamed bodies."""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.streaming = headers.get('content-type', '').startswith('text/event-stream')
+        self.buffer = b""
+        self.counts: Optional[Tuple[int, int]] = None
+
+    def feed(self, chunk: bytes):
+        if not self.streaming:
+            if len(self.buffer) + len(chunk) <= _MAX_USAGE_BODY:
+                self.buffer += chunk
+            return
+        self.buffer += chunk
+        *events, self.buffer = self.buffer.split(b"\n\n")
+        for event in events:
+            if b'"timings"' in event or b'"usage"' in event:
+                self._parse(event.removeprefix(b"data: "))
+
+    def finish(self) -> Optional[Tuple[int, int]]:
+        if not self.streaming and self.buffer:
+            self._parse(self.buffer)
+        return self.counts
+
+    def _parse(self, data: bytes):
+        try:
+            self.counts = usage_counts(json.loads(data)) or self.counts
+        except ValueError:
+            pass
+
+
+class Model:
+    """One model from routes.json and the replicas its host names currently resolve to."""
+
+    def __init__(self, key: str, config: Dict[str, Any]):
+        self.key = key
+        self.aliases = [key] + list(config.get('aliases', []))
+        self.hosts = [self._split(host) for host in config.get('hosts', [])]
+        self.routing = Routing(**config.get('routing', {}))
+        self.replicas: Dict[str, Replica] = {}
+        self.stats = ModelStats()
+
+    @staticmethod
+    def _split(host: str) -> Tuple[str, int]:
+        name, _, port = host.rpartition(':')
+        return (name, int(port)) if name else (host, 8080)
+
+    async def resolve(self):
+        """Re-resolve every host (a headless Service returns one address per ready pod)."""
+        loop = asyncio.get_running_loop()
+        found: Dict[str, Tuple[str, int]] = {}
+        for name, port in self.hosts:
+            try:
+                infos = await loop.getaddrinfo(name, port, type=socket.SOCK_STREAM)
+            except OSError:
+                continue
+            for info in infos:
+                address = info[4][0]
+                found[f"{address}:{port}"] = (address, port)
+        if not found and self.replicas:
+            # Keep the last known replicas on a transient DNS failure
+            return
+        for key in list(self.replicas):
+            if key not in found:
+                self.replicas.pop(key).close_idle()
+        for key, (address, port) in found.items():
+            self.replicas.setdefault(key, Replica(self.key, address, port))
+
+
+class Router:
+    def __init__(self, routes: Dict[str, Any], options: RouterOptions):
+        self.options = options
+        self.models = {key: Model(key, config) for key, config in routes.get('models', {}).items()}
+        self.aliases: Dict[str, List[Model]] = {}
+        for model in self.models.values():
+            for alias in model.aliases:
+                self.aliases.setdefault(alias, []).append(model)
+        default = routes.get('default', [])
+        self.default = [self.models[key] for key in ([default] if isinstance(default, str) else default)
+                        if key in self.models]
+        self.aliases.setdefault('default', self.default)
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._tasks: List[asyncio.Task] = []
+        self._rings: Dict[Tuple[str, ...], HashRing] = {}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def start(self, host: str, port: int) -> int:
+        await asyncio.gather(*(model.resolve() for model in self.models.values()))
+        await self.check_health()
+        self._tasks = [asyncio.create_task(self._every(self.options.resolve_interval, self._resolve_all)),
+                       asyncio.create_task(self._every(self.options.health_interval, self.check_health))]
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for model in self.models.values():
+            for replica in model.replicas.values():
+                replica.close_idle()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _every(self, interval: float, action):
+        while True:
+            await asyncio.sleep(interval)
+            await action()
+
+    async def _resolve_all(self):
+        await asyncio.gather(*(model.resolve() for model in self.models.values()))
+        self._rings.clear()
+
+    async def check_health(self):
+        replicas = [r for model in self.models.values() for r in model.replicas.values()]
+        await asyncio.gather(*(self._probe(replica) for replica in replicas))
+
+    async def _probe(self, replica: Replica):
+        """llama-server answers 503 on /health while the model is loading."""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(replica.address, replica.port), self.options.connect_timeout)
+            try:
+                writer.write(f"GET /health HTTP/1.1\r\nHost: {replica.key}\r\nConnection: close\r\n\r\n".encode())
+                status_line, _ = await asyncio.wait_for(read_head(reader), self.options.connect_timeout)
+                replica.healthy = status_line.split()[1] == '200'
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, IndexError):
+            replica.healthy = False
+
+    # -- routing -------------------------------------------------------------
+
+    def pick(self, models: List[Model], tried: set) -> Optional[Replica]:
+        now = time.monotonic()
+        candidates = [r for model in models for r in model.replicas.values()
+                      if r.key not in tried and r.available(now)]
+        if not candidates:
+            # Everything is ejected or failing health checks: still try the least-recently-failed one
+            candidates = [r for model in models for r in model.replicas.values() if r.key not in tried]
+            candidates.sort(key=lambda r: r.ejected_until)
+            candidates = candidates[:1]
+        if not candidates:
+            return None
+        seen = [r.ewma_ms for r in candidates if r.ewma_ms is not None]
+        # Unmeasured replicas look as fast as the fastest known one so they get traffic and a sample
+        unseen_ms = min(seen) if seen else 1.0
+        best = min(r.score(unseen_ms) for r in candidates)
+        return random.choice([r for r in candidates if r.score(unseen_ms) == best])
+
+    def _ring(self, replicas: List[Replica]) -> HashRing:
+        key = tuple(sorted(replica.key for replica in replicas))
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = HashRing(replicas)
+        return ring
+
+    def pick_prefix(self, models: List[Model], tried: set, prefix: str) -> Optional[Replica]:
+        """Consistent hashing with bounded load: the prefix's owner unless it is over capacity.
+
+        The ring covers every known replica so ownership does not move while a
+        replica is briefly ejected; unavailable replicas are skipped on the walk.
+        """
+        routing = models[0].routing
+        replicas = [r for model in models for r in model.replicas.values()]
+        now = time.monotonic()
+        available = [r for r in replicas if r.key not in tried and r.available(now)]
+        open_keys = {r.key for r in available}
+        if not available:
+            return self.pick(models, tried)
+        capacity = math.ceil(routing.load_factor * (sum(r.in_flight for r in available) + 1) / len(available))
+        owner = None
+        for replica in self._ring(replicas).walk(_hash(prefix)):
+            owner = owner or replica
+            if replica.key in open_keys and replica.in_flight < capacity:
+                stats = self.models[replica.model].stats
+                if replica is owner:
+                    stats.prefix_owner += 1
+                else:
+                    stats.prefix_spilled += 1
+                return replica
+        return self.pick(models, tried)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'default': [model.key for model in self.default],
+            'models': {
+                model.key: {
+                    'aliases': model.aliases,
+                    'routing': model.routing.mode,
+                    'prefix_owner': model.stats.prefix_owner,
+                    'prefix_spilled': model.stats.prefix_spilled,
+                    'prompt_tokens': model.stats.prompt_tokens,
+                    'cached_tokens': model.stats.cached_tokens,
+                    'cache_hit_ratio': round(model.stats.cache_hit_ratio, 4),
+                    'replicas': [{
+                        'address': r.key, 'healthy': r.healthy, 'available': r.available(now),
+                        'in_flight': r.in_flight, 'latency_ewma_ms': round(r.ewma_ms, 1) if r.ewma_ms else None,
+                        'requests': r.requests, 'failures': r.failures, 'idle_connections': len(r.idle),
+                    } for r in model.replicas.values()],
+                } for model in self.models.values()
+            },
+        }
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of routing and cache counters."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{rendered}}} {value:g}")
+
+        models = list(self.models.values())
+        replicas = [(model, r) for model in models for r in model.replicas.values()]
+        family('ramalama_router_requests_total', 'counter', 'Requests proxied to each replica',
+               [({'model': m.key, 'replica': r.key}, r.requests) for m, r in replicas])
+        family('ramalama_router_in_flight_requests', 'gauge', 'Requests currently proxied to each replica',
+               [({'model': m.key, 'replica': r.key}, r.in_flight) for m, r in replicas])
+        family('ramalama_router_replica_available', 'gauge', '1 if the replica is healthy and not ejected',
+               [({'model': m.key, 'replica': r.key}, int(r.available(time.monotonic()))) for m, r in replicas])
+        family('ramalama_router_latency_ewma_seconds', 'gauge', 'Smoothed time to first response byte',
+               [({'model': m.key, 'replica': r.key}, r.ewma_ms / 1000) for m, r in replicas
+                if r.ewma_ms is not None])
+        family('ramalama_router_prefix_routed_total', 'counter',
+               'prefix_hash requests sent to the prefix owner or spilled to another replica by the load bound',
+               [({'model': m.key, 'outcome': 'owner'}, m.stats.prefix_owner) for m in models]
+               + [({'model': m.key, 'outcome': 'spilled'}, m.stats.prefix_spilled) for m in models])
+        family('ramalama_router_prompt_tokens_total', 'counter', 'Prompt tokens reported by llama-server',
+               [({'model': m.key}, m.stats.prompt_tokens) for m in models])
+        family('ramalama_router_cached_prompt_tokens_total', 'counter',
+               'Prompt tokens llama-server served from its prompt cache',
+               [({'model': m.key}, m.stats.cached_tokens) for m in models])
+        family('ramalama_router_prompt_cache_hit_ratio', 'gauge', 'Cached share of prompt tokens since start',
+               [({'model': m.key}, round(m.stats.cache_hit_ratio, 4)) for m in models])
+        lines.append("# HELP ramalama_router_ttft_seconds Time to the first streamed response chunk")
+        lines.append("# TYPE ramalama_router_ttft_seconds histogram")
+        for m in models:
+            cumulative = 0
+            for bound, count in zip(_TTFT_BUCKETS, m.stats.ttft_buckets):
+                cumulative += count
+                lines.append(f'ramalama_router_ttft_seconds_bucket{{model="{m.key}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'ramalama_router_ttft_seconds_bucket{{model="{m.key}",le="+Inf"}} {m.stats.ttft_count}')
+            lines.append(f'ramalama_router_ttft_seconds_sum{{model="{m.key}"}} {m.stats.ttft_sum:g}')
+            lines.append(f'ramalama_router_ttft_seconds_count{{model="{m.key}"}} {m.stats.ttft_count}')
+        return "\n".join(lines) + "\n"
+
+    # -- client side ---------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line, headers = await read_head(reader)
+                except asyncio.IncompleteReadError:
+                    return
+                method, target, version = request_line.split(' ', 2)
+                body = b"".join([chunk async for chunk in iter_body(reader, headers)])
+                reusable = keep_alive(headers, version)
+                if not await self._dispatch(method, target, headers, body, writer, reusable) or not reusable:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes,
+                        writer: asyncio.StreamWriter, reusable: bool) -> bool:
+        """Answer one request; returns False if the client connection can no longer be reused."""
+        path = target.split('?', 1)[0]
+        if method == 'GET' and path == '/health':
+            return await self._send_json(writer, 200, {'status': 'ok'}, reusable)
+        if method == 'GET' and path == '/router/status':
+            return await self._send_json(writer, 200, self.status(), reusable)
+        if method == 'GET' and path == '/metrics':
+            data = self.metrics().encode()
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if reusable else 'close'}"
+                         f"\r\n\r\n".encode() + data)
+            await writer.drain()
+            return True
+        if method == 'GET' and path == '/v1/models':
+            return await self._send_json(writer, 200, {
+                'object': 'list',
+                'data': [{'id': alias, 'object': 'model', 'owned_by': 'ramalama'} for alias in self.aliases],
+            }, reusable)
+
+        request: Dict[str, Any] = {}
+        if body:
+            try:
+                request = json.loads(body)
+            except ValueError:
+                pass
+        if not isinstance(request, dict):
+            request = {}
+        model_name = request.get('model') or 'default'
+        models = self.aliases.get(model_name)
+        if not models:
+            return await self._send_json(writer, 404, {'error': {
+                'message': f"model '{model_name}' is not served by this router",
+                'type': 'invalid_request_error', 'code': 'model_not_found'}}, reusable)
+        # A route across several models uses the routing settings of the first one
+        prefix = ''
+        if models[0].routing.mode == 'prefix_hash':
+            prefix = prompt_prefix(request, models[0].routing.prefix_chars)
+        return await self._proxy(models, method, target, headers, body, writer, reusable, prefix)
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any, reusable: bool) -> bool:
+        data = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if reusable else 'close'}"
+                     f"\r\n\r\n".encode() + data)
+        await writer.drain()
+        return True
+
+    async def _proxy(self, models: List[Model], method: str, target: str, headers: Dict[str, str], body: bytes,
+                     writer: asyncio.StreamWriter, reusable: bool, prefix: str = '') -> bool:
+        tried: set = set()
+        last_error = "no replicas resolved"
+        for _ in range(self.options.retries + 1):
+            replica = self.pick_prefix(models, tried, prefix) if prefix else self.pick(models, tried)
+            if replica is None:
+                break
+            tried.add(replica.key)
+            replica.in_flight += 1
+            try:
+                return await self._forward(replica, method, target, headers, body, writer, reusable)
+            except BackendError as e:
+                last_error = f"{replica.key}: {e}"
+                replica.fail(self.options.eject_seconds)
+            finally:
+                replica.in_flight -= 1
+        return await self._send_json(writer, 503, {'error': {
+            'message': f"no healthy replica could serve the request ({last_error})",
+            'type': 'server_error', 'code': 'backend_unavailable'}}, reusable)
+
+    async def _exchange(self, replica: Replica, request: bytes):
+        """Send the request and read the response head, retrying once on a fresh connection if a
+        pooled one turns out to be stale."""
+        for attempt in range(2):
+            try:
+                reader, conn, pooled = await replica.acquire(self.options.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                raise BackendError(f"connect failed: {e or type(e).__name__}")
+            try:
+                conn.write(request)
+                await conn.drain()
+                status_line, response_headers = await asyncio.wait_for(read_head(reader), self.options.timeout)
+                return reader, conn, status_line, response_headers
+            except (OSError, asyncio.IncompleteReadError) as e:
+                conn.close()
+                if not pooled or attempt:
+                    raise BackendError(f"connection lost: {e or type(e).__name__}")
+            except asyncio.TimeoutError:
+                conn.close()
+                raise BackendError(f"no response within {self.options.timeout:g}s")
+
+    async def _forward(self, replica: Replica, method: str, target: str, headers: Dict[str, str], body: bytes,
+                       writer: asyncio.StreamWriter, reusable: bool) -> bool:
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {replica.key}", "Connection: keep-alive"]
+        lines += [f"{name}: {headers[name]}" for name in _FORWARD_HEADERS if name in headers]
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body)}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+        started = time.monotonic()
+        reader, conn, status_line, response_headers = await self._exchange(replica, request)
+        version, status = status_line.split(' ', 2)[:2]
+        if int(status) in _RETRYABLE_STATUS:
+            conn.close()
+            raise BackendError(f"status {status}")
+
+        if method == 'HEAD' or status in ('204', '304'):
+            response_headers['content-length'] = '0'
+        framed = 'content-length' in response_headers or \
+            response_headers.get('transfer-encoding', '').lower() == 'chunked'
+        chunked = not framed or response_headers.get('transfer-encoding', '').lower() == 'chunked'
+        out = [status_line.replace(version, 'HTTP/1.1', 1)]
+        out += [f"{name}: {value}" for name, value in response_headers.items() if name not in _HOP_HEADERS]
+        out.append("Transfer-Encoding: chunked" if chunked else
+                   f"Content-Length: {response_headers['content-length']}")
+        out.append(f"Connection: {'keep-alive' if reusable else 'close'}")
+        writer.write(("\r\n".join(out) + "\r\n\r\n").encode())
+        replica.requests += 1
+
+        # From here the response is committed to the client; a backend failure ends both connections
+        first = True
+        complete = False
+        usage = UsageScanner(response_headers)
+        try:
+            async for chunk in iter_body(reader, response_headers, until_eof=not framed):
+                if first:
+                    elapsed = time.monotonic() - started
+                    replica.observe(elapsed * 1000)
+                    if usage.streaming:
+                        self.models[replica.model].stats.observe_ttft(elapsed)
+                    first = False
+                usage.feed(chunk)
+                writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n" if chunked else chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+            if first:
+                replica.observe((time.monotonic() - started) * 1000)
+            complete = True
+            counts = usage.finish()
+            if counts is not None:
+                stats = self.models[replica.model].stats
+                stats.prompt_tokens += counts[0]
+                stats.cached_tokens += counts[1]
+        except (OSError, asyncio.IncompleteReadError):
+            # Closing the backend connection also stops generation for a client that went away
+            return False
+        finally:
+            replica.release(reader, conn, complete and framed and keep_alive(response_headers, version),
+                            self.options.max_idle)
+        return True
+
+
+_REASONS = {200: 'OK', 404: 'Not Found', 503: 'Service Unavailable'}
+
+
+def parse_backend(text: str) -> Tuple[str, List[str]]:
+    """Parse 'alias=host:port[,host:port...]' into a routes.json model entry."""
+    alias, _, hosts = text.partition('=')
+    if not alias or not hosts:
+        raise argparse.ArgumentTypeError(f"expected MODEL=HOST:PORT[,HOST:PORT...], got '{text}'")
+    return alias, [h.removeprefix('http://').rstrip('/') for h in hosts.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency-aware OpenAI-compatible router for ramalama models')
+    parser.add_argument('--config', help='Route table generated by generate-from-config.py (routes.json)')
+    parser.add_argument('--backend', type=parse_backend, action='append', default=[],
+                        help='Add a model without a config file: MODEL=HOST:PORT[,HOST:PORT...] (repeatable)')
+    parser.add_argument('--host', default='0.0.0.0', help='Listen address')
+    parser.add_argument('--port', type=int, default=8080, help='Listen port')
+    parser.add_argument('--retries', type=int, default=2, help='Other replicas to try when one fails')
+    parser.add_argument('--connect-timeout', type=float, default=5.0, help='Backend connect timeout in seconds')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Seconds to wait for response headers')
+    parser.add_argument('--health-interval', type=float, default=5.0, help='Seconds between /health probes')
+    parser.add_argument('--resolve-interval', type=float, default=15.0, help='Seconds between DNS refreshes')
+    parser.add_argument('--eject-seconds', type=float, default=5.0,
+                        help='Initial time a failing replica is skipped (doubles per consecutive failure)')
+    args = parser.parse_args()
+
+    routes: Dict[str, Any] = {'models': {}}
+    if args.config:
+        with open(args.config) as f:
+            routes = json.load(f)
+    for alias, hosts in args.backend:
+        routes['models'][alias] = {'hosts': hosts}
+        routes.setdefault('default', alias)
+    if not routes['models']:
+        parser.error('no models: pass --config or --backend')
+
+    router = Router(routes, RouterOptions(
+        retries=args.retries, connect_timeout=args.connect_timeout, timeout=args.timeout,
+        health_interval=args.health_interval, resolve_interval=args.resolve_interval,
+        eject_seconds=args.eject_seconds,
+    ))
+
+    async def serve():
+        port = await router.start(args.host, args.port)
+        print(f"Routing {len(router.models)} models on http://{args.host}:{port}/v1", file=sys.stderr)
+        await router.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
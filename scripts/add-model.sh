@@ -295,13 +295,9 @@ FROM ${BASE_IMAGE_NAME}
 ARG MODEL_SOURCE_NAME
 
 # Copy the entire /models directory from the model source
-# into the final application image.
-COPY --from=${MODEL_SOURCE_NAME} /models /mnt/models
-
-# This is a sanity check for OpenShift's random user ID.
-USER root
-RUN chmod -R a+rX /mnt/models
-USER 1001
+# into the final application image. Permissions are set at copy time
+# (readable by OpenShift's random user ID) so the weights stay in one layer.
+COPY --from=${MODEL_SOURCE_NAME} --chown=0:0 --chmod=0755 /models /mnt/models
 
 # Optional: Add labels to describe your new all-in-one image
 LABEL maintainer="{{MAINTAINER}}"
@@ -442,6 +438,7 @@ substitute_template() {
         -e "s|{{CACHE_REUSE}}|$CACHE_REUSE|g" \
         -e "s|{{MAINTAINER}}|$MAINTAINER|g" \
         -e "s|{{LIGHTSPEED_NAMESPACE}}|$LIGHTSPEED_NAMESPACE|g" \
+        -e "s|{{EXTRA_[A-Z_]*}}||g" \
         "$template_file" > "$output_file"
 }
 
@@ -571,6 +568,13 @@ EOF
 # Update models.yaml with this model so it is recognized by generators
 update_models_yaml
 
+# Render the rest of the model's outputs (probes, ServiceMonitor, dashboard) from models.yaml
+if python3 "$SCRIPT_DIR/generate-from-config.py" --repo-root "$REPO_ROOT" --incremental >/dev/null; then
+    log_success "Rendered ${MODEL_NAME_SAFE} with generate-from-config.py"
+else
+    log_warning "generate-from-config.py failed; run it before deploying ${MODEL_NAME_SAFE}"
+fi
+
 # Summary
 echo
 log_success "Model $MODEL_NAME added successfully!"
@@ -578,6 +582,8 @@ echo
 echo -e "${BLUE}Generated files:${NC}"
 echo "  - containerfiles/Containerfile-${MODEL_NAME_SAFE}"
 echo "  - k8s/models/${MODEL_NAME_SAFE}/kustomization.yaml"
+echo "  - k8s/models/${MODEL_NAME_SAFE}/servicemonitor.yaml"
+echo "  - k8s/models/${MODEL_NAME_SAFE}/grafana-dashboard.json"
 echo "  - models/${MODEL_NAME_SAFE}.conf"
 if [[ "$CREATE_LIGHTSPEED_OVERLAY" == "true" ]]; then
     echo "  - k8s/lightspeed/overlays/${MODEL_NAME_SAFE}/kustomization.yaml"
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+
+"""
+bench.py - Load-test OpenAI-compatible model services generated from models.yaml
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import random
+import ssl
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Filler vocabulary for synthetic prompts; most entries are a single token in common tokenizers
+_WORDS = (
+    "pod node cluster service deployment namespace container image volume secret config route "
+    "scale replica label selector probe limit request memory cpu network policy operator event "
+    "rollout health ingress storage quota role binding account token cache model server latency"
+).split()
+
+
+def load_generator():
+    """Import generate-from-config.py (not importable by name because of the dashes)."""
+    spec = importlib.util.spec_from_file_location("generate_from_config", SCRIPTS_DIR / "generate-from-config.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules.setdefault("generate_from_config", module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def service_url(model_name_safe: str, namespace: str = "ramalama", port: int = 8080) -> str:
+    """In-cluster base URL of a generated model's Service."""
+    return f"http://{model_name_safe}-ramalama-service.{namespace}.svc.cluster.local:{port}/v1"
+
+
+def resolve_model_url(model_key: str, config_path: Path, repo_root: Path,
+                      namespace: Optional[str] = None) -> Tuple[str, str]:
+    """Look a model up in the catalog and return its service URL and llama-server alias."""
+    generator_module = load_generator()
+    generator = generator_module.ModelGenerator(str(config_path), str(repo_root))
+    catalog = generator.load_catalog()
+    if model_key not in catalog:
+        raise SystemExit(f"Error: model '{model_key}' not found in {config_path}")
+    spec = catalog[model_key]
+    namespace = namespace or generator_module._namespace(spec.config)
+    return service_url(spec.name_safe, namespace, spec.parameters.port), f"{spec.name_safe}-model"
+
+
+# ---------------------------------------------------------------------------
+# Prompt length distributions
+# ---------------------------------------------------------------------------
+
+def parse_distribution(spec: str):
+    """Parse 'fixed:N', 'uniform:LO:HI', 'normal:MEAN:STDDEV' or 'choice:A,B,C' into a sampler."""
+    kind, _, rest = spec.partition(':')
+    try:
+        if kind == 'fixed':
+            value = int(rest)
+            return lambda rng: value
+        if kind == 'uniform':
+            lo, hi = (int(v) for v in rest.split(':'))
+            return lambda rng: rng.randint(lo, hi)
+        if kind == 'normal':
+            mean, stddev = (float(v) for v in rest.split(':'))
+            return lambda rng: max(1, int(rng.gauss(mean, stddev)))
+        if kind == 'choice':
+            values = [int(v) for v in rest.split(',')]
+            return lambda rng: rng.choice(values)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(
+        f"invalid distribution '{spec}' (use fixed:N, uniform:LO:HI, normal:MEAN:STDDEV or choice:A,B,...)"
+    )
+
+
+def make_prompt(rng: random.Random, tokens: int, prefix: str = "") -> str:
+    body = " ".join(rng.choice(_WORDS) for _ in range(tokens))
+    return f"{prefix}{body}" if prefix else body
+
+
+# ---------------------------------------------------------------------------
+# Minimal asyncio HTTP/1.1 client (stdlib only, so it runs in any pod or CI job)
+# ---------------------------------------------------------------------------
+
+async def _open(url: str, method: str, path_suffix: str, body: Optional[bytes], timeout: float):
+    parts = urlsplit(url.rstrip('/') + path_suffix)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if secure else None),
+        timeout,
+    )
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = [
+        f"{method} {target} HTTP/1.1",
+        f"Host: {parts.hostname}:{port}",
+        "Accept: */*",
+        "Connection: close",
+    ]
+    if body is not None:
+        headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + (body or b""))
+    await writer.drain()
+
+    status_line = await asyncio.wait_for(reader.readline(), timeout)
+    if not status_line:
+        raise ConnectionError("connection closed before response")
+    status = int(status_line.split()[1])
+    response_headers: Dict[str, str] = {}
+    while True:
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    return reader, writer, status, response_headers
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif 'content-length' in headers:
+        yield await reader.readexactly(int(headers['content-length']))
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+
+async def _read_all(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    return b"".join([chunk async for chunk in _iter_body(reader, headers)])
+
+
+async def http_request(url: str, method: str = 'GET', path_suffix: str = '', payload: Any = None,
+                       timeout: float = 30.0) -> Tuple[int, bytes]:
+    body = json.dumps(payload).encode() if payload is not None else None
+    reader, writer, status, headers = await _open(url, method, path_suffix, body, timeout)
+    try:
+        data = await asyncio.wait_for(_read_all(reader, headers), timeout)
+    finally:
+        writer.close()
+    return status, data
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class RequestResult:
+    prompt_tokens: int
+    completion_tokens: int = 0
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    inter_token: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class BenchConfig:
+    url: str
+    model: str
+    concurrency: int = 4
+    requests: int = 32
+    prompt_tokens: str = "uniform:64:512"
+    max_tokens: int = 128
+    stream: bool = True
+    seed: int = 0
+    timeout: float = 300.0
+    system_prompt: str = ""
+
+
+async def run_request(config: BenchConfig, prompt: str, prompt_tokens: int) -> RequestResult:
+    result = RequestResult(prompt_tokens=prompt_tokens)
+    messages = []
+    if config.system_prompt:
+        messages.append({"role": "system", "content": config.system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    payload = {
+        "model": config.model,
+        "messages": messages,
+        "max_tokens": config.max_tokens,
+        "stream": config.stream,
+    }
+    if config.stream:
+        payload["stream_options"] = {"include_usage": True}
+
+    start = time.perf_counter()
+    last = start
+
+    async def read_response(reader: asyncio.StreamReader, status: int, headers: Dict[str, str]):
+        nonlocal last
+        if status != 200:
+            body = await _read_all(reader, headers)
+            result.error = f"HTTP {status}: {body[:200].decode(errors='replace')}"
+            return
+        if not config.stream:
+            # Without streaming there is no first-token timestamp; only latency is measured
+            body = await _read_all(reader, headers)
+            usage = json.loads(body).get('usage', {})
+            result.completion_tokens = usage.get('completion_tokens', 0)
+            result.prompt_tokens = usage.get('prompt_tokens', prompt_tokens)
+            return
+
+        buffer = b""
+        usage_tokens = None
+        async for chunk in _iter_body(reader, headers):
+            buffer += chunk
+            while b"\n\n" in buffer:
+                event, buffer = buffer.split(b"\n\n", 1)
+                for line in event.splitlines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        continue
+                    message = json.loads(data)
+                    if message.get('usage'):
+                        usage_tokens = message['usage'].get('completion_tokens')
+                        result.prompt_tokens = message['usage'].get('prompt_tokens', result.prompt_tokens)
+                    choices = message.get('choices') or [{}]
+                    if not choices[0].get('delta', {}).get('content'):
+                        continue
+                    now = time.perf_counter()
+                    if result.ttft is None:
+                        result.ttft = now - start
+                    else:
+                        result.inter_token.append(now - last)
+                    last = now
+                    result.completion_tokens += 1
+        if usage_tokens is not None:
+            result.completion_tokens = usage_tokens
+
+    try:
+        reader, writer, status, headers = await _open(
+            config.url, 'POST', '/chat/completions', json.dumps(payload).encode(), config.timeout
+        )
+        try:
+            # The timeout covers the whole request, so a stalled stream cannot hang a worker
+            remaining = max(0.0, config.timeout - (time.perf_counter() - start))
+            await asyncio.wait_for(read_response(reader, status, headers), remaining)
+        finally:
+            writer.close()
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.latency = time.perf_counter() - start
+    return result
+
+
+async def run_benchmark(config: BenchConfig) -> Dict[str, Any]:
+    """Issue ``config.requests`` chat completions with at most ``config.concurrency`` in flight."""
+    rng = random.Random(config.seed)
+    sampler = parse_distribution(config.prompt_tokens)
+    prompts = []
+    for _ in range(config.requests):
+        tokens = sampler(rng)
+        prompts.append((make_prompt(rng, tokens), tokens))
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in prompts:
+        queue.put_nowait(item)
+    results: List[RequestResult] = []
+
+    async def worker():
+        while True:
+            try:
+                prompt, tokens = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await run_request(config, prompt, tokens))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, config.concurrency))))
+    duration = time.perf_counter() - start
+    return {
+        "config": asdict(config),
+        "summary": summarize(results, duration),
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an unsorted list."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def describe(values: List[float], scale: float = 1.0) -> Dict[str, float]:
+    if not values:
+        return {}
+    scaled = [v * scale for v in values]
+    return {
+        "mean": round(sum(scaled) / len(scaled), 3),
+        "min": round(min(scaled), 3),
+        "p50": round(percentile(scaled, 50), 3),
+        "p95": round(percentile(scaled, 95), 3),
+        "p99": round(percentile(scaled, 99), 3),
+        "max": round(max(scaled), 3),
+    }
+
+
+def summarize(results: List[RequestResult], duration: float) -> Dict[str, Any]:
+    ok = [r for r in results if r.error is None]
+    completion_tokens = sum(r.completion_tokens for r in ok)
+    # Decode speed after the first token when streaming (the first token is part of TTFT, so
+    # it is not counted), end-to-end speed otherwise
+    per_request_tps = [
+        (r.completion_tokens - 1) / (r.latency - r.ttft) if r.ttft is not None else r.completion_tokens / r.latency
+        for r in ok if r.latency > (r.ttft or 0.0) and r.completion_tokens > 1
+    ]
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_samples": sorted({r.error for r in results if r.error})[:5],
+        "duration_s": round(duration, 3),
+        "requests_per_s": round(len(ok) / duration, 3) if duration else 0.0,
+        "prompt_tokens": sum(r.prompt_tokens for r in ok),
+        "completion_tokens": completion_tokens,
+        "output_tokens_per_s": round(completion_tokens / duration, 3) if duration else 0.0,
+        "ttft_ms": describe([r.ttft for r in ok if r.ttft is not None], 1000),
+        "inter_token_ms": describe([gap for r in ok for gap in r.inter_token], 1000),
+        "latency_ms": describe([r.latency for r in ok], 1000),
+        "request_tokens_per_s": describe(per_request_tps),
+    }
+
+
+# Metrics where a lower value is better; everything else compared is higher-is-better
+_LOWER_IS_BETTER = ("ttft_ms", "inter_token_ms", "latency_ms", "errors")
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Tuple[str, float, float, float]]:
+    """Return (metric, baseline, candidate, percent change) rows for two benchmark reports."""
+    rows = []
+    base, cand = baseline["summary"], candidate["summary"]
+    for key in ("output_tokens_per_s", "requests_per_s", "errors"):
+        rows.append((key, base.get(key, 0), cand.get(key, 0)))
+    for key in ("ttft_ms", "inter_token_ms", "latency_ms", "request_tokens_per_s"):
+        for stat in ("p50", "p95", "p99"):
+            if stat in base.get(key, {}) and stat in cand.get(key, {}):
+                rows.append((f"{key}.{stat}", base[key][stat], cand[key][stat]))
+    return [(name, b, c, ((c - b) / b * 100) if b else 0.0) for name, b, c in rows]
+
+
+# ---------------------------------------------------------------------------
+# Mock llama-server for testing without a GPU or network
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class MockServerConfig:
+    ttft_ms: float = 50.0
+    prefill_ms_per_token: float = 0.05
+    itl_ms: float = 10.0
+    slots: int = 1
+    batch_penalty: float = 0.15
+
+
+class MockServer:
+    """Tiny OpenAI-compatible server that streams synthetic tokens with llama-server-like timing.
+
+    Requests beyond ``slots`` queue, and each additional busy slot slows token
+    generation by ``batch_penalty``, roughly like continuous batching on CPU.
+    """
+
+    def __init__(self, config: MockServerConfig):
+        self.config = config
+        self.active = 0
+        self._slots = asyncio.Semaphore(max(1, config.slots))
+        self._server: Optional[asyncio.base_events.Server] = None
+        self.port = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.port}/v1"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+            if method == 'GET' and target == '/health':
+                self._send_json(writer, 200, {"status": "ok"})
+            elif method == 'GET' and target == '/v1/models':
+                self._send_json(writer, 200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+            elif method == 'POST' and target == '/v1/chat/completions':
+                await self._chat(writer, json.loads(body or b"{}"))
+            else:
+                self._send_json(writer, 404, {"error": {"message": f"no route for {method} {target}"}})
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+
+    async def _chat(self, writer: asyncio.StreamWriter, request: Dict[str, Any]):
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in request.get('messages', []))
+        max_tokens = int(request.get('max_tokens') or 16)
+        model = request.get('model', 'mock-model')
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": max_tokens,
+                 "total_tokens": prompt_tokens + max_tokens}
+
+        async with self._slots:
+            self.active += 1
+            try:
+                await asyncio.sleep((self.config.ttft_ms + self.config.prefill_ms_per_token * prompt_tokens) / 1000)
+                if not request.get('stream'):
+                    for _ in range(max_tokens):
+                        await asyncio.sleep(self._token_delay())
+                    self._send_json(writer, 200, {
+                        "object": "chat.completion", "model": model, "usage": usage,
+                        "choices": [{"index": 0, "finish_reason": "length",
+                                     "message": {"role": "assistant", "content": "tok " * max_tokens}}],
+                    })
+                    return
+
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+                for i in range(max_tokens):
+                    if i:
+                        await asyncio.sleep(self._token_delay())
+                    self._send_event(writer, {"object": "chat.completion.chunk", "model": model,
+                                              "choices": [{"index": 0, "delta": {"content": "tok "}}]})
+                    await writer.drain()
+                self._send_event(writer, {"object": "chat.completion.chunk", "model": model, "usage": usage,
+                                          "choices": [{"index": 0, "delta": {}, "finish_reason": "length"}]})
+                writer.write(self._chunk(b"data: [DONE]\n\n") + b"0\r\n\r\n")
+            finally:
+                self.active -= 1
+
+    def _token_delay(self) -> float:
+        return self.config.itl_ms * (1 + self.config.batch_penalty * (self.active - 1)) / 1000
+
+    def _chunk(self, data: bytes) -> bytes:
+        return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+    def _send_event(self, writer: asyncio.StreamWriter, payload: Dict[str, Any]):
+        writer.write(self._chunk(b"data: " + json.dumps(payload).encode() + b"\n\n"))
+
+
+def mock_config_from_args(args) -> MockServerConfig:
+    return MockServerConfig(
+        ttft_ms=args.mock_ttft_ms,
+        prefill_ms_per_token=args.mock_prefill_ms,
+        itl_ms=args.mock_itl_ms,
+        slots=args.mock_slots,
+        batch_penalty=args.mock_batch_penalty,
+    )
+
+
+async def run_against_mock(config: BenchConfig, mock: MockServerConfig) -> Dict[str, Any]:
+    server = MockServer(mock)
+    config.url = await server.start()
+    try:
+        report = await run_benchmark(config)
+    finally:
+        await server.stop()
+    report["config"]["mock"] = asdict(mock)
+    return report
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group('mock server')
+    group.add_argument('--mock-ttft-ms', type=float, default=50.0, help='Base time to first token')
+    group.add_argument('--mock-prefill-ms', type=float, default=0.05, help='Extra TTFT per prompt token')
+    group.add_argument('--mock-itl-ms', type=float, default=10.0, help='Inter-token latency with one busy slot')
+    group.add_argument('--mock-slots', type=int, default=1, help='Concurrent requests served; the rest queue')
+    group.add_argument('--mock-batch-penalty', type=float, default=0.15,
+                       help='Fractional slowdown of token generation per additional busy slot')
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--concurrency', type=int, default=4, help='Requests in flight at once')
+    parser.add_argument('--requests', '-n', type=int, default=32, help='Total requests to send')
+    parser.add_argument('--prompt-tokens', default='uniform:64:512', type=str,
+                        help='Prompt length distribution: fixed:N, uniform:LO:HI, normal:MEAN:STDDEV, choice:A,B')
+    parser.add_argument('--max-tokens', type=int, default=128, help='max_tokens for each completion')
+    parser.add_argument('--no-stream', dest='stream', action='store_false', help='Disable SSE streaming')
+    parser.add_argument('--system-prompt', default='', help='System prompt sent with every request')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for prompt generation')
+    parser.add_argument('--timeout', type=float, default=300.0, help='Per-request timeout in seconds')
+
+
+def add_target_arguments(parser: argparse.ArgumentParser):
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--model', '-m', help='Model key from models.yaml; targets its generated Service')
+    target.add_argument('--url', help='Explicit OpenAI-compatible base URL (e.g. http://localhost:8080/v1)')
+    target.add_argument('--mock', action='store_true', help='Benchmark an in-process mock server')
+    parser.add_argument('--namespace', help="Namespace of the model Services (default: the model's lightspeed_namespace)")
+    parser.add_argument('--config', '-c', default='models/models.yaml', help='Path to the YAML configuration file')
+    parser.add_argument('--repo-root', '-r', default='.', help='Path to the repository root')
+    add_mock_arguments(parser)
+
+
+def resolve_target(args) -> Tuple[str, str]:
+    """Return (base URL, model alias) for --model/--url/--mock."""
+    if args.model:
+        repo_root = Path(args.repo_root).resolve()
+        return resolve_model_url(args.model, repo_root / args.config, repo_root, args.namespace)
+    if args.url:
+        return args.url, 'default'
+    return '', 'mock-model'
+
+
+def bench_config_from_args(args, url: str, alias: str) -> BenchConfig:
+    return BenchConfig(
+        url=url,
+        model=alias,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        prompt_tokens=args.prompt_tokens,
+        max_tokens=args.max_tokens,
+        stream=args.stream,
+        seed=args.seed,
+        timeout=args.timeout,
+        system_prompt=args.system_prompt,
+    )
+
+
+def print_summary(report: Dict[str, Any]):
+    summary = report["summary"]
+    print(f"Requests: {summary['requests']} ({summary['errors']} errors) in {summary['duration_s']}s",
+          file=sys.stderr)
+    print(f"Output tokens/s: {summary['output_tokens_per_s']}  requests/s: {summary['requests_per_s']}",
+          file=sys.stderr)
+    for key in ("ttft_ms", "inter_token_ms", "latency_ms"):
+        stats = summary[key]
+        if stats:
+            print(f"{key:>15}: p50 {stats['p50']:>9}  p95 {stats['p95']:>9}  p99 {stats['p99']:>9}",
+                  file=sys.stderr)
+    for error in summary["error_samples"]:
+        print(f"  error: {error}", file=sys.stderr)
+
+
+def cmd_run(args) -> int:
+    url, alias = resolve_target(args)
+    config = bench_config_from_args(args, url, alias)
+    parse_distribution(config.prompt_tokens)
+    if args.mock:
+        report = asyncio.run(run_against_mock(config, mock_config_from_args(args)))
+    else:
+        report = asyncio.run(run_benchmark(config))
+    if args.model:
+        report["config"]["model_key"] = args.model
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    print_summary(report)
+    return 1 if report["summary"]["errors"] == report["summary"]["requests"] else 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{'metric':<28}{'baseline':>14}{'candidate':>14}{'change':>10}")
+    regressions = 0
+    for name, base, cand, change in compare(baseline, candidate):
+        lower_better = name.startswith(_LOWER_IS_BETTER)
+        worse = change > args.threshold if lower_better else change < -args.threshold
+        regressions += worse
+        print(f"{name:<28}{base:>14.3f}{cand:>14.3f}{change:>+9.1f}%{'  !' if worse else ''}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def cmd_mock_server(args) -> int:
+    async def serve():
+        server = MockServer(mock_config_from_args(args))
+        url = await server.start(args.host, args.port)
+        print(f"Mock llama-server listening on {url}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OpenAI-compatible model services')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Run a load test and report latency/throughput as JSON')
+    add_target_arguments(run)
+    add_load_arguments(run)
+    run.add_argument('--output', '-o', help='Write the JSON report here instead of stdout')
+    run.set_defaults(func=cmd_run)
+
+    cmp = subparsers.add_parser('compare', help='Compare two JSON reports')
+    cmp.add_argument('baseline')
+    cmp.add_argument('candidate')
+    cmp.add_argument('--threshold', type=float, default=5.0, help='Percent change counted as a regression')
+    cmp.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any metric regressed')
+    cmp.set_defaults(func=cmd_compare)
+
+    mock = subparsers.add_parser('mock-server', help='Run the mock llama-server standalone')
+    mock.add_argument('--host', default='127.0.0.1')
+    mock.add_argument('--port', type=int, default=8080)
+    add_mock_arguments(mock)
+    mock.set_defaults(func=cmd_mock_server)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,763 @@ generate-from-config.py - Generate Containerfiles, k8s deployments, and workflow
 """
 
 import argparse
+import copy
+import hashlib
+import json
+import math
 import os
 import sys
 import yaml
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import re
+import struct
+
+# Bump whenever a change to this script alters rendered output so that
+# incremental runs re-render every model.
+GENERATOR_VERSION = "11"
+MANIFEST_NAME = ".generate-manifest.json"
+
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+class TemplateError(RuntimeError):
+    """Raised when a template cannot be loaded or references undefined variables."""
+
+
+class Template:
+    """A {{VAR}} template parsed once into literal and placeholder segments."""
+
+    __slots__ = ('name', 'segments', 'variables')
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        segments = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(source):
+            if match.start() > pos:
+                segments.append((False, source[pos:match.start()]))
+            segments.append((True, match.group(1)))
+            pos = match.end()
+        if pos < len(source):
+            segments.append((False, source[pos:]))
+        self.segments: Tuple[Tuple[bool, str], ...] = tuple(segments)
+        self.variables = frozenset(value for is_var, value in self.segments if is_var)
+
+    def render(self, variables: Dict[str, Any], strict: bool = True) -> str:
+        """Render the template; in strict mode undefined variables raise TemplateError."""
+        if strict:
+            missing = self.variables.difference(variables)
+            if missing:
+                raise TemplateError(
+                    f"Template '{self.name}' references undefined variables: {', '.join(sorted(missing))}"
+                )
+        return ''.join(
+            str(variables.get(value, "")) if is_var else value
+            for is_var, value in self.segments
+        )
+
+
+class TemplateCache:
+    """Compiled templates keyed by relative path, recompiled when the file's mtime changes."""
+
+    def __init__(self, templates_dir: Path):
+        self.templates_dir = templates_dir
+        self._entries: Dict[str, Tuple[int, Template]] = {}
+
+    def names(self) -> List[str]:
+        return sorted(
+            str(path.relative_to(self.templates_dir))
+            for path in self.templates_dir.rglob('*') if path.is_file()
+        )
+
+    def get(self, relative_template_path: str) -> Template:
+        template_path = self.templates_dir / relative_template_path
+        try:
+            mtime = template_path.stat().st_mtime_ns
+            entry = self._entries.get(relative_template_path)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            with open(template_path, 'r') as f:
+                template = Template(relative_template_path, f.read())
+        except OSError as e:
+            raise TemplateError(f"Failed to load template '{relative_template_path}': {e}")
+        self._entries[relative_template_path] = (mtime, template)
+        return template
+
+    def preload(self):
+        for name in self.names():
+            self.get(name)
+
+
+class ConfigError(ValueError):
+    """Raised when models.yaml fails validation; carries one message per problem."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+class _LocatedDict(dict):
+    """Mapping loaded from YAML that remembers the line of itself and of each key."""
+
+    line = 0
+    key_lines: Dict[Any, int] = {}
+
+
+class _LineLoader(yaml.SafeLoader):
+    """SafeLoader that records source lines so validation errors can point at them."""
+
+
+def _construct_located_map(loader: _LineLoader, node: yaml.MappingNode):
+    data = _LocatedDict()
+    data.line = node.start_mark.line + 1
+    yield data
+    data.update(loader.construct_mapping(node))
+    data.key_lines = {
+        loader.construct_object(key_node): key_node.start_mark.line + 1
+        for key_node, _ in node.value
+    }
+
+
+_LineLoader.add_constructor('tag:yaml.org,2002:map', _construct_located_map)
+
+_QUANTITY_RE = re.compile(r"^\d+(\.\d+)?(Ki|Mi|Gi|Ti|Pi|Ei|k|M|G|T|P|E|m)?$")
+
+
+@dataclass(frozen=True, slots=True)
+class Parameters:
+    """llama-server runtime parameters for one model."""
+
+    ctx_size: int = 4096
+    threads: int = 14
+    temp: float = 0.7
+    top_k: int = 40
+    top_p: float = 0.9
+    min_p: float = 0
+    cache_reuse: int = 256
+    host: str = "0.0.0.0"
+    port: int = 8080
+    # Per-model overrides of the serving profile (llama-server defaults otherwise)
+    parallel: int = 1
+    batch_size: int = 2048
+    ubatch_size: int = 512
+
+
+@dataclass(frozen=True, slots=True)
+class ResourceQuantities:
+    memory: Optional[str] = None
+    cpu: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Resources:
+    requests: Optional[ResourceQuantities] = None
+    limits: Optional[ResourceQuantities] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ModelSpec:
+    """A fully merged and validated catalog entry."""
+
+    key: str
+    name_safe: str
+    config: Dict[str, Any]
+    parameters: Parameters
+    resources: Resources
+
+
+# Scalar/dict types accepted for each top-level key of a model entry (or defaults)
+MODEL_FIELD_TYPES: Dict[str, tuple] = {
+    'name': (str,),
+    'description': (str,),
+    'model_source': (str,),
+    'model_gguf_url': (str,),
+    'model_file': (str,),
+    'maintainer': (str,),
+    'template': (str,),
+    'resource_size': (str,),
+    'create_lightspeed_overlay': (bool,),
+    'lightspeed_namespace': (str,),
+    'registry_path': (str,),
+    'parameters': (dict,),
+    'resources': (dict,),
+    'labels': (dict,),
+    'sizing': (dict,),
+    'serving_profile': (str,),
+    'weights': (dict,),
+    'routing': (dict,),
+    'autoscaling': (dict,),
+    'startup': (dict,),
+    'monitoring': (dict,),
+    'cpu': (dict,),
+    'draft_model': (str,),
+    'draft': (dict,),
+    'quant': (str,),
+    'variants': (list,),
+    'variant_service': (bool,),
+}
+
+# Parameters that, when set on a model, override the same field of its serving profile
+SERVING_PARAMETER_KEYS = ('parallel', 'batch_size', 'ubatch_size')
+
+# Fields of a serving profile under the top-level ``serving_profiles`` mapping
+SERVING_PROFILE_FIELD_TYPES: Dict[str, tuple] = {
+    'parallel': (int,),
+    'cont_batching': (bool,),
+    'batch_size': (int,),
+    'ubatch_size': (int,),
+    'cache_type_k': (str,),
+    'cache_type_v': (str,),
+    'flash_attn': (bool, str),
+    'mlock': (bool,),
+    'no_mmap': (bool,),
+    'extra_memory_per_slot': (str,),
+}
+
+SIZING_FIELD_TYPES: Dict[str, tuple] = {
+    'gguf': (str,),
+    'headroom': (int, float),
+    'overhead_mib': (int,),
+    'extra_memory_per_slot': (str,),
+}
+
+# How a model's weights reach the pod: baked into a per-model image, mounted from
+# the model source image as an OCI image volume, or downloaded once per node into
+# a hostPath cache. The last two run the shared runtime image.
+WEIGHTS_MODES = ('baked', 'image_volume', 'node_cache')
+
+WEIGHTS_FIELD_TYPES: Dict[str, tuple] = {
+    'mode': (str,),
+    'image': (str,),
+    'pull_policy': (str,),
+    'url': (str,),
+    'host_path': (str,),
+    'prefetch': (bool,),
+    'runtime_image': (str,),
+}
+
+# Top-level ``router`` section: which models serve the "default" alias of the
+# auto-discovery router (scripts/router.py)
+ROUTER_FIELD_TYPES: Dict[str, tuple] = {
+    'default': (str, list),
+}
+
+# Per-model ``routing`` block, copied into routes.json: least_latency scores
+# replicas by in-flight x latency; prefix_hash pins prompts that share their
+# first prefix_chars characters to one replica so its prompt cache is reused,
+# spilling to the next replica on the hash ring past load_factor x average load
+ROUTING_MODES = ('least_latency', 'prefix_hash')
+
+ROUTING_FIELD_TYPES: Dict[str, tuple] = {
+    'mode': (str,),
+    'prefix_chars': (int,),
+    'load_factor': (int, float),
+}
+
+# Per-model ``autoscaling`` block. Targets are per-replica values of llama-server's
+# own /metrics (enabled with --metrics for autoscaled models); each one that is set
+# becomes a metric of an HPA or a Prometheus trigger of a KEDA ScaledObject
+AUTOSCALING_ENGINES = ('hpa', 'keda')
+
+AUTOSCALING_FIELD_TYPES: Dict[str, tuple] = {
+    'engine': (str,),
+    'min_replicas': (int,),
+    'max_replicas': (int,),
+    'requests_deferred': (int, float),
+    'requests_processing': (int, float),
+    'kv_cache_usage': (int, float),
+    'tokens_per_second': (int, float),
+    'scale_down_window': (int,),
+    'prometheus_address': (str,),
+    'trigger_auth': (str,),
+}
+
+# Target -> (pods metric name the HPA reads from the custom metrics API, PromQL summed over the model's pods for KEDA)
+AUTOSCALING_METRICS: Dict[str, Tuple[str, str]] = {
+    'requests_deferred': ('llamacpp_requests_deferred', 'sum(llamacpp:requests_deferred{{{selector}}})'),
+    'requests_processing': ('llamacpp_requests_processing', 'sum(llamacpp:requests_processing{{{selector}}})'),
+    'kv_cache_usage': ('llamacpp_kv_cache_usage_ratio', 'sum(llamacpp:kv_cache_usage_ratio{{{selector}}})'),
+    'tokens_per_second': ('llamacpp_tokens_predicted_per_second',
+                          'sum(rate(llamacpp:tokens_predicted_total{{{selector}}}[1m]))'),
+}
+
+# OpenShift user-workload monitoring; the tenancy port answers queries for one namespace
+DEFAULT_NAMESPACE = "ramalama"
+DEFAULT_PROMETHEUS_ADDRESS = "https://thanos-querier.openshift-monitoring.svc.cluster.local:9092"
+
+# Per-model ``startup`` block: the startupProbe allows base_seconds plus
+# seconds_per_gib for each GiB of weights (from the GGUF header, model_size, or
+# the memory request), and warmup gates readiness on a hot model
+STARTUP_FIELD_TYPES: Dict[str, tuple] = {
+    'warmup': (bool,),
+    'warmup_tokens': (int,),
+    'base_seconds': (int,),
+    'seconds_per_gib': (int, float),
+    'model_size': (str,),
+}
+
+# Per-model ``monitoring`` block. Every model serves /metrics and gets a Grafana
+# dashboard; the ServiceMonitor (a prometheus-operator CRD) can be turned off
+MONITORING_FIELD_TYPES: Dict[str, tuple] = {
+    'service_monitor': (bool,),
+    'interval': (str,),
+}
+
+# Per-model ``cpu`` block. performance makes the pod Guaranteed QoS with whole
+# CPUs (exclusive cores under the kubelet's static CPU manager policy) and runs
+# one llama-server thread per core for both generation and batch processing
+CPU_FIELD_TYPES: Dict[str, tuple] = {
+    'performance': (bool,),
+    'cores': (int,),
+    'detect_threads': (bool,),
+    'numa': (str,),
+}
+
+NUMA_MODES = ('distribute', 'isolate', 'numactl')
+
+# Size --threads/--threads-batch from the container's CPU set and cgroup v2 quota at start.
+# nproc honours the CPU manager's cpuset; the quota covers pods without exclusive cores.
+# Avoids $(...) since Kubernetes expands $(NAME) in container commands.
+DETECT_THREADS_SCRIPT = (
+    'n=`nproc`; '
+    'f=/sys/fs/cgroup/cpu.max; '
+    'if [ -r "$f" ] && read -r quota period < "$f" && [ "$quota" != max ]; then '
+    'q=`expr "$quota" / "$period"`; [ "$q" -lt 1 ] && q=1; [ "$q" -lt "$n" ] && n=$q; fi; '
+    'exec /usr/bin/llama-server "$@" --threads "$n" --threads-batch "$n"'
+)
+
+# Speculative decoding: ``draft_model`` names a smaller catalog model with the same
+# tokenizer, and the ``draft`` block tunes it. Defaults suit CPU inference, where
+# verifying a long draft costs nearly as much as generating it
+DRAFT_FIELD_TYPES: Dict[str, tuple] = {
+    'max': (int,),
+    'min': (int,),
+    'p_min': (int, float),
+    'ctx_size': (int,),
+}
+
+DRAFT_DEFAULTS = {'max': 8, 'min': 2, 'p_min': 0.8}
+
+# Where image_volume models mount the draft model's source image
+DRAFT_MOUNT_PATH = "/mnt/draft-models"
+
+# Quantization in a GGUF file name, e.g. "Qwen3-4B-Q4_K_M.gguf" or "gpt-oss-20b-UD-Q4_K_XL.gguf"
+_QUANT_RE = re.compile(r"(?<=[-_.])((?:UD-)?(?:I?Q\d(?:_[A-Z0-9]+)*|BF16|F16|F32))(?=\.gguf$)", re.IGNORECASE)
+
+# Approximate bits per weight of llama.cpp quantization types, used to scale a
+# ``variants`` entry from its base model. Unsloth's dynamic UD-*_XL quants keep
+# more tensors at high precision than the matching _M mix.
+QUANT_BITS_PER_WEIGHT = {
+    'F32': 32.0, 'F16': 16.0, 'BF16': 16.0, 'Q8_0': 8.5, 'Q8_K_XL': 9.5,
+    'Q6_K': 6.56, 'Q6_K_XL': 7.0, 'Q5_1': 6.0, 'Q5_0': 5.5, 'Q5_K_M': 5.69, 'Q5_K_S': 5.54,
+    'Q5_K_XL': 5.9, 'Q4_1': 5.0, 'Q4_0': 4.5, 'Q4_K_M': 4.89, 'Q4_K_S': 4.58, 'Q4_K_XL': 5.0,
+    'IQ4_NL': 4.5, 'IQ4_XS': 4.25, 'Q3_K_L': 4.27, 'Q3_K_M': 3.91, 'Q3_K_S': 3.5, 'Q3_K_XL': 4.1,
+    'IQ3_M': 3.66, 'IQ3_S': 3.44, 'IQ3_XS': 3.3, 'IQ3_XXS': 3.06, 'Q2_K': 3.0, 'Q2_K_XL': 3.2,
+    'IQ2_M': 2.7, 'IQ2_S': 2.5, 'IQ2_XS': 2.31, 'IQ2_XXS': 2.06, 'IQ1_M': 1.75, 'IQ1_S': 1.56,
+}
+
+# Pod label shared by a model and its variants; ``variant_service`` selects it for A/B traffic
+VARIANT_GROUP_LABEL = "ramalama.io/variant-group"
+
+STARTUP_PROBE_PERIOD = 10
+# Index of '--no-warmup' in the base Deployment's llama-server args
+NO_WARMUP_ARG_INDEX = 4
+
+# llama-server image built from containerfiles/Containerfile-min (BASE_IMAGE_NAME_SUFFIX in the workflow)
+RUNTIME_IMAGE_NAME = "centos-ramalama-min"
+NODE_CACHE_PATH = "/var/lib/ramalama/models"
+
+# Files the base image is built from; their hash stands in for its digest in build fingerprints
+BASE_IMAGE_INPUTS = ("containerfiles/Containerfile-min", "scripts/build-script.sh")
+# Length of the fingerprint prefixes used in CI cache keys
+CACHE_KEY_DIGITS = 16
+
+# Download $WEIGHTS_URL to $MODEL_FILE unless a previous pod on this node already did.
+# The rename is atomic, so concurrent pods never see a partial file.
+FETCH_WEIGHTS_SCRIPT = (
+    'set -eu; '
+    'if [ -s "$MODEL_FILE" ]; then echo "Using cached $MODEL_FILE"; exit 0; fi; '
+    'mkdir -p "${MODEL_FILE%/*}"; '
+    'tmp="$MODEL_FILE.$HOSTNAME.partial"; '
+    'trap \'rm -f "$tmp"\' EXIT; '
+    'curl -fL --retry 5 --retry-delay 10 -o "$tmp" "$WEIGHTS_URL"; '
+    'mv -f "$tmp" "$MODEL_FILE"'
+)
+# The model pods only read the node cache; the prefetch DaemonSet is the only writer
+WAIT_WEIGHTS_SCRIPT = (
+    'until [ -s "$MODEL_FILE" ]; do echo "Waiting for weights-prefetch to cache $MODEL_FILE"; sleep 10; done'
+)
+# OpenShift SCC that admits hostPath volumes and the root download; bound to the node cache's ServiceAccount
+NODE_CACHE_SCC = "hostmount-anyuid"
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a new plain dict with ``override`` merged into ``base``; neither input is mutated."""
+    merged: Dict[str, Any] = {}
+    for source in (base, override):
+        for key, value in source.items():
+            if isinstance(value, dict):
+                existing = merged.get(key)
+                merged[key] = _deep_merge(existing if isinstance(existing, dict) else {}, value)
+            else:
+                merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _weights_url(model_config: Dict[str, Any]) -> Optional[str]:
+    """HTTP(S) URL a node cache downloads the GGUF from: weights.url, else model_gguf_url."""
+    url = model_config.get('weights', {}).get('url') or model_config.get('model_gguf_url', '')
+    if url.startswith('hf://') and url.count('/') >= 4:
+        # hf://<org>/<repo>/<path> -> https://huggingface.co/<org>/<repo>/resolve/main/<path>
+        org, repo, file_path = url[len('hf://'):].split('/', 2)
+        return f"https://huggingface.co/{org}/{repo}/resolve/main/{file_path}"
+    if url.startswith(('https://', 'http://')):
+        return url
+    return None
+
+
+def _namespace(model_config: Dict[str, Any]) -> str:
+    """Namespace a model is deployed to; Lightspeed and the router reach it there too."""
+    return model_config.get('lightspeed_namespace', DEFAULT_NAMESPACE)
+
+
+def _pod_selector(model_config: Dict[str, Any]) -> str:
+    """PromQL label matchers for the pods of a model's Deployment."""
+    namespace = _namespace(model_config)
+    return f'namespace="{namespace}",pod=~"{model_config["model_name_safe"]}-ramalama-deployment-.*"'
+
+
+def _matches(value: Any, expected: tuple) -> bool:
+    # bool is an int subclass; never accept it where a number is expected
+    if isinstance(value, bool) and bool not in expected:
+        return False
+    return isinstance(value, expected)
+
+
+_PARAMETER_TYPES: Dict[str, tuple] = {
+    f.name: {int: (int,), float: (int, float), str: (str,)}[f.type] for f in fields(Parameters)
+}
+
+
+def _type_names(expected: tuple) -> str:
+    names = {bool: 'a boolean', int: 'an integer', float: 'a number', str: 'a string', dict: 'a mapping'}
+    return ' or '.join(names[t] for t in expected if not (t is int and float in expected))
+
+
+# GGUF metadata value types (see ggml/docs/gguf.md)
+_GGUF_SCALARS = {
+    0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i',
+    6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d',
+}
+_GGUF_STRING = 8
+_GGUF_ARRAY = 9
+# Numeric arrays up to this length are kept (e.g. per-layer head counts); longer ones are skipped
+_GGUF_MAX_KEPT_ARRAY = 4096
+
+# llama_ftype values stored in general.file_type
+GGUF_FILE_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 7: 'Q8_0', 8: 'Q5_0', 9: 'Q5_1',
+    10: 'Q2_K', 11: 'Q3_K_S', 12: 'Q3_K_M', 13: 'Q3_K_L', 14: 'Q4_K_S', 15: 'Q4_K_M',
+    16: 'Q5_K_S', 17: 'Q5_K_M', 18: 'Q6_K', 19: 'IQ2_XXS', 20: 'IQ2_XS', 21: 'Q2_K_S',
+    22: 'IQ3_XS', 23: 'IQ3_XXS', 24: 'IQ1_S', 25: 'IQ4_NL', 26: 'IQ3_S', 27: 'IQ3_M',
+    28: 'IQ2_S', 29: 'IQ2_M', 30: 'IQ4_XS', 31: 'IQ1_M', 32: 'BF16', 36: 'TQ1_0', 37: 'TQ2_0',
+}
+
+# Bytes per element for llama.cpp KV cache types (block size 32 for quantized types)
+KV_CACHE_TYPE_BYTES = {
+    'f32': 4.0, 'f16': 2.0, 'bf16': 2.0,
+    'q8_0': 34 / 32, 'q5_1': 24 / 32, 'q5_0': 22 / 32, 'q4_1': 20 / 32, 'q4_0': 18 / 32, 'iq4_nl': 18 / 32,
+}
+
+_MIB = 1024 * 1024
+
+
+class GGUFError(ValueError):
+    """Raised when a file is not a readable GGUF model."""
+
+
+@dataclass(frozen=True, slots=True)
+class GGUFInfo:
+    """Header-level facts about a GGUF model; the tensor data is never read."""
+
+    path: str
+    architecture: str
+    parameter_count: int
+    file_type: str
+    block_count: int
+    head_count: int
+    head_count_kv: int
+    key_length: int
+    value_length: int
+    context_length: int
+    weights_bytes: int
+
+
+def _gguf_read(f, fmt: str):
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise GGUFError("unexpected end of file in GGUF header")
+    return struct.unpack(fmt, data)[0]
+
+
+def _gguf_string(f) -> bytes:
+    length = _gguf_read(f, '<Q')
+    data = f.read(length)
+    if len(data) != length:
+        raise GGUFError("unexpected end of file in GGUF header")
+    return data
+
+
+def _gguf_value(f, value_type: int):
+    if value_type in _GGUF_SCALARS:
+        return _gguf_read(f, _GGUF_SCALARS[value_type])
+    if value_type == _GGUF_STRING:
+        return _gguf_string(f).decode('utf-8', errors='replace')
+    if value_type == _GGUF_ARRAY:
+        item_type = _gguf_read(f, '<I')
+        count = _gguf_read(f, '<Q')
+        if item_type in _GGUF_SCALARS:
+            fmt = _GGUF_SCALARS[item_type]
+            size = struct.calcsize(fmt) * count
+            data = f.read(size)
+            if len(data) != size:
+                raise GGUFError("unexpected end of file in GGUF header")
+            if count > _GGUF_MAX_KEPT_ARRAY:
+                return None
+            return list(struct.unpack(f"<{count}{fmt[1]}", data))
+        for _ in range(count):
+            _gguf_value(f, item_type)
+        return None
+    raise GGUFError(f"unknown GGUF value type {value_type}")
+
+
+def read_gguf_header(path: str) -> GGUFInfo:
+    """Parse the metadata and tensor index of a GGUF file without loading any weights."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(4) != b'GGUF':
+                raise GGUFError(f"{path} is not a GGUF file")
+            version = _gguf_read(f, '<I')
+            if version < 2:
+                raise GGUFError(f"{path}: GGUF version {version} is not supported")
+            tensor_count = _gguf_read(f, '<Q')
+            kv_count = _gguf_read(f, '<Q')
+
+            metadata: Dict[str, Any] = {}
+            for _ in range(kv_count):
+                key = _gguf_string(f).decode('utf-8', errors='replace')
+                metadata[key] = _gguf_value(f, _gguf_read(f, '<I'))
+
+            parameter_count = 0
+            for _ in range(tensor_count):
+                _gguf_string(f)
+                n_dims = _gguf_read(f, '<I')
+                elements = 1
+                for _ in range(n_dims):
+                    elements *= _gguf_read(f, '<Q')
+                _gguf_read(f, '<I')  # tensor type
+                _gguf_read(f, '<Q')  # data offset
+                parameter_count += elements
+
+            alignment = metadata.get('general.alignment') or 32
+            data_offset = -(-f.tell() // alignment) * alignment
+            weights_bytes = max(0, os.fstat(f.fileno()).st_size - data_offset)
+    except OSError as e:
+        raise GGUFError(f"cannot read {path}: {e}")
+    except struct.error as e:
+        raise GGUFError(f"{path}: malformed GGUF header: {e}")
+
+    arch = metadata.get('general.architecture', 'llama')
+
+    def arch_int(name: str, default: int = 0) -> int:
+        value = metadata.get(f"{arch}.{name}", default)
+        if isinstance(value, list):
+            # Per-layer values (e.g. sliding-window models); size for the largest layer
+            value = max(value) if value else default
+        return int(value or default)
+
+    head_count = arch_int('attention.head_count')
+    embedding_length = arch_int('embedding_length')
+    default_head_dim = embedding_length // head_count if head_count else 0
+    file_type = metadata.get('general.file_type')
+    return GGUFInfo(
+        path=str(path),
+        architecture=arch,
+        parameter_count=parameter_count,
+        file_type=GGUF_FILE_TYPES.get(file_type, str(file_type) if file_type is not None else 'unknown'),
+        block_count=arch_int('block_count'),
+        head_count=head_count,
+        head_count_kv=arch_int('attention.head_count_kv', head_count),
+        key_length=arch_int('attention.key_length', default_head_dim),
+        value_length=arch_int('attention.value_length', default_head_dim),
+        context_length=arch_int('context_length'),
+        weights_bytes=weights_bytes,
+    )
+
+
+def kv_cache_bytes(info: GGUFInfo, ctx_size: int, cache_type_k: str = 'f16', cache_type_v: str = 'f16') -> int:
+    """Bytes needed for the K and V caches of every layer at ``ctx_size`` tokens."""
+    per_token_layer = info.head_count_kv * (
+        info.key_length * KV_CACHE_TYPE_BYTES[cache_type_k] + info.value_length * KV_CACHE_TYPE_BYTES[cache_type_v]
+    )
+    return int(info.block_count * ctx_size * per_token_layer)
+
+
+def _format_memory(num_bytes: float) -> str:
+    """Round up to a 256Mi boundary and format as a Kubernetes quantity."""
+    mib = -(-int(num_bytes) // (256 * _MIB)) * 256
+    return f"{mib // 1024}Gi" if mib % 1024 == 0 else f"{mib}Mi"
+
+
+def _format_quantity(value: float) -> str:
+    """Format a number as a Kubernetes quantity, using milli-units for fractions."""
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{round(value * 1000)}m"
+
+
+_MEMORY_UNITS = {
+    'Ki': 1024, 'Mi': 1024 ** 2, 'Gi': 1024 ** 3, 'Ti': 1024 ** 4,
+    'k': 1000, 'M': 1000 ** 2, 'G': 1000 ** 3, 'T': 1000 ** 4,
+}
+
+
+def parse_memory(quantity: Any) -> int:
+    """Convert a Kubernetes memory quantity ('4Gi', '512Mi', '1G') into bytes."""
+    text = str(quantity)
+    for suffix in ('Ki', 'Mi', 'Gi', 'Ti', 'k', 'M', 'G', 'T'):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * _MEMORY_UNITS[suffix])
+    return int(float(text))
+
+
+def parse_cpu(quantity: Any) -> float:
+    """Convert a Kubernetes CPU quantity ('4', '3500m', 2) into cores."""
+    text = str(quantity)
+    return int(text[:-1]) / 1000 if text.endswith('m') else float(text)
+
+
+def size_model(info: GGUFInfo, model_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive resources and llama-server parameters for a merged model config from its GGUF header."""
+    sizing = model_config.get('sizing', {})
+    params = dict(model_config.get('parameters', {}))
+    resources = _deep_merge({}, model_config.get('resources', {}))
+
+    # Never ask for more context than the model was trained on
+    ctx_size = params.get('ctx_size', 4096)
+    if info.context_length and ctx_size > info.context_length:
+        ctx_size = info.context_length
+    params['ctx_size'] = ctx_size
+    # Explicit values (e.g. written back by sweep.py) win over the derived ones
+    params.setdefault('cache_reuse', 256 if ctx_size >= 2048 else 0)
+
+    # Every parallel slot gets its own ctx_size worth of KV cache
+    serving = model_config.get('serving', {})
+    kv_bytes = kv_cache_bytes(info, ctx_size * serving.get('parallel', 1),
+                              serving.get('cache_type_k', 'f16'), serving.get('cache_type_v', 'f16'))
+    request_bytes = info.weights_bytes + kv_bytes + sizing.get('overhead_mib', 768) * _MIB
+    limit_bytes = request_bytes * sizing.get('headroom', 1.25)
+    resources.setdefault('requests', {})['memory'] = _format_memory(request_bytes)
+    resources.setdefault('limits', {})['memory'] = _format_memory(limit_bytes)
+
+    # One llama-server thread per allotted core; more threads than cores just contend
+    cpu = resources.get('limits', {}).get('cpu', resources.get('requests', {}).get('cpu'))
+    if cpu is not None:
+        params.setdefault('threads', max(1, int(parse_cpu(cpu))))
+
+    summary = (
+        f"{info.architecture} {info.parameter_count / 1e9:.2f}B params, {info.file_type}, "
+        f"{info.block_count} layers, weights {info.weights_bytes / (1024 * _MIB):.2f}Gi, "
+        f"KV cache {kv_bytes / (1024 * _MIB):.2f}Gi at ctx {ctx_size} x {serving.get('parallel', 1)} slots "
+        f"(trained {info.context_length})"
+    )
+    return {'parameters': params, 'resources': resources, 'sizing_summary': summary,
+            'model_bytes': info.weights_bytes}
+
+
+def quant_ratio(base_quant: Optional[str], quant: str) -> Optional[float]:
+    """Approximate weights size of ``quant`` relative to ``base_quant``, or None if either is unknown."""
+    def bits(name: Optional[str]) -> Optional[float]:
+        return QUANT_BITS_PER_WEIGHT.get(re.sub(r'^UD-', '', name.upper())) if name else None
+
+    base_bits, variant_bits = bits(base_quant), bits(quant)
+    return variant_bits / base_bits if base_bits and variant_bits else None
+
+
+def size_variant(model_config: Dict[str, Any], base_config: Dict[str, Any], ratio: float) -> Dict[str, Any]:
+    """Scale a quantization variant's memory from its base model.
+
+    When the base was sized from its GGUF header only the weights differ, so
+    the change in weight bytes is applied to the base's memory. Otherwise the
+    whole memory is scaled by ``ratio``; smaller quants keep their memory then,
+    as the share taken by KV cache and overhead is not known.
+    """
+    resources = _deep_merge({}, model_config.get('resources', {}))
+    base_bytes = base_config.get('model_bytes')
+    if base_bytes:
+        delta = base_bytes * (ratio - 1)
+        for section, quantities in base_config.get('resources', {}).items():
+            if 'memory' in quantities:
+                resources.setdefault(section, {})['memory'] = _format_memory(parse_memory(quantities['memory']) + delta)
+        return {'resources': resources, 'model_bytes': int(base_bytes * ratio)}
+    if ratio > 1:
+        for quantities in resources.values():
+            if 'memory' in quantities:
+                quantities['memory'] = _format_memory(parse_memory(quantities['memory']) * ratio)
+    return {'resources': resources}
+
+
+def cpu_allotment(model_config: Dict[str, Any]) -> Optional[int]:
+    """Whole CPUs the model's pod may use, or None when it sets no CPU quantity.
+
+    This is the ceiling for llama-server's ``threads``; sweep.py uses it to
+    bound the thread counts it tries.
+    """
+    cpu_config = model_config.get('cpu', {})
+    resources = model_config.get('resources', {})
+    cpu = resources.get('limits', {}).get('cpu', resources.get('requests', {}).get('cpu'))
+    if cpu_config.get('performance'):
+        return cpu_config.get('cores') or (max(1, math.ceil(parse_cpu(cpu))) if cpu is not None else 1)
+    return max(1, int(parse_cpu(cpu))) if cpu is not None else None
+
+
+def size_cpu(model_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit llama-server's thread count to the pod's CPU allotment.
+
+    Threads beyond the CPUs the pod may use only contend with each other, so
+    ``threads`` is capped at the CPU limit (or request), and -1 (one per host
+    core) or no value becomes the allotment. In performance mode the pod asks for whole
+    CPUs with requests equal to limits, which makes it Guaranteed QoS and lets
+    the static CPU manager give it exclusive cores.
+    """
+    params = dict(model_config.get('parameters', {}))
+    resources = _deep_merge({}, model_config.get('resources', {}))
+    allotment = cpu_allotment(model_config)
+
+    if model_config.get('cpu', {}).get('performance'):
+        memories = [quantities['memory'] for quantities in (resources.get('requests', {}), resources.get('limits', {}))
+                    if 'memory' in quantities]
+        memory = max(memories, key=parse_memory) if memories else None
+        for section in ('requests', 'limits'):
+            resources.setdefault(section, {})['cpu'] = str(allotment)
+            if memory is not None:
+                resources[section]['memory'] = memory
+        params['threads'] = allotment
+    elif allotment is not None:
+        # Unset threads would render as the template default, which ignores the allotment
+        if params.get('threads', 0) <= 0 or params['threads'] > allotment:
+            params['threads'] = allotment
+    return {'parameters': params, 'resources': resources}
+
 
 class ModelGenerator:
-    def __init__(self, config_path: str, repo_root: str):
+    def __init__(self, config_path: str, repo_root: str, strict_templates: bool = True,
+                 gguf_dir: Optional[str] = None):
         self.config_path = Path(config_path)
         self.repo_root = Path(repo_root)
         self.config = self._load_config()
@@ -26,31 +774,35 @@ class ModelGenerator:
         self.templates_dir = self.scripts_dir / "templates"
         self.workflow_dir = self.repo_root / ".github" / "workflows"
         self.lightspeed_dir = self.repo_root / "k8s" / "lightspeed" / "overlays"
+        self.manifest_path = self.models_dir / MANIFEST_NAME
+        self.templates = TemplateCache(self.templates_dir)
+        self._template_layers: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._catalog: Optional[Dict[str, ModelSpec]] = None
+        self.strict_templates = strict_templates
+        self.gguf_dir = Path(gguf_dir) if gguf_dir else None
         
         for dir_path in [self.containerfiles_dir, self.k8s_dir, self.models_dir, self.lightspeed_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
+    def _preload_templates(self):
+        """Compile every template up front so pool workers inherit the cache instead of re-reading."""
+        self.templates.preload()
+
     def _render_template_file(self, relative_template_path: str, variables: Dict[str, Any]) -> str:
         """Render a text template with {{VAR}} placeholders from the templates directory."""
-        template_path = self.templates_dir / relative_template_path
-        try:
-            with open(template_path, 'r') as f:
-                content = f.read()
-        except Exception as e:
-            raise RuntimeError(f"Failed to load template '{relative_template_path}': {e}")
+        return self.templates.get(relative_template_path).render(variables, strict=self.strict_templates)
 
-        def replace(match: re.Match) -> str:
-            key = match.group(1)
-            return str(variables.get(key, ""))
-
-        return re.sub(r"\{\{(\w+)\}\}", replace, content)
+    def template_variables(self) -> Dict[str, List[str]]:
+        """Return the variables each template under the templates directory requires."""
+        self.templates.preload()
+        return {name: sorted(self.templates.get(name).variables) for name in self.templates.names()}
 
     def _load_config(self) -> Dict[str, Any]:
-        """Load and validate the YAML configuration."""
+        """Load the YAML configuration, keeping line numbers for validation errors."""
         try:
             with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            return config
+                config = yaml.load(f, Loader=_LineLoader)
+            return config if config is not None else {}
         except Exception as e:
             print(f"Error loading config: {e}")
             sys.exit(1)
@@ -59,30 +811,262 @@ class ModelGenerator:
         """Sanitize model name for file names."""
         return re.sub(r'[^a-z0-9-]', '-', name.lower()).strip('-')
 
+    def _location(self, mapping: Any, key: Any = None) -> str:
+        """Return ``file:line`` for a key (or the mapping itself) loaded from the config."""
+        line = getattr(mapping, 'key_lines', {}).get(key) if key is not None else None
+        line = line or getattr(mapping, 'line', 0)
+        return f"{self.config_path.name}:{line}" if line else self.config_path.name
+
+    def _find_gguf(self, model_config: Dict[str, Any]) -> Optional[Path]:
+        """Locate a local GGUF for a model: sizing.gguf, else model_file's basename in --gguf-dir."""
+        explicit = model_config.get('sizing', {}).get('gguf')
+        if explicit:
+            return self.repo_root / explicit
+        if self.gguf_dir is not None and model_config.get('model_file'):
+            candidate = self.gguf_dir / Path(model_config['model_file']).name
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def _validate_typed(self, data: Dict[str, Any], path: str, types: Dict[str, tuple], errors: List[str]):
+        """Check every key of a flat mapping against a name -> accepted types table."""
+        for key, value in data.items():
+            expected = types.get(key)
+            if expected is None:
+                errors.append(f"{self._location(data, key)}: {path}.{key} is not a known setting")
+            elif not _matches(value, expected):
+                errors.append(f"{self._location(data, key)}: {path}.{key} must be {_type_names(expected)}, got {value!r}")
+
+    def _validate_parameters(self, params: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(params, path, _PARAMETER_TYPES, errors)
+
+    def _validate_resources(self, resources: Dict[str, Any], path: str, errors: List[str]):
+        for section, quantities in resources.items():
+            where = self._location(resources, section)
+            if section not in ('requests', 'limits'):
+                errors.append(f"{where}: {path}.{section} must be 'requests' or 'limits'")
+                continue
+            if not isinstance(quantities, dict):
+                errors.append(f"{where}: {path}.{section} must be a mapping")
+                continue
+            for name, value in quantities.items():
+                where = self._location(quantities, name)
+                if name not in ('memory', 'cpu'):
+                    errors.append(f"{where}: {path}.{section}.{name} must be 'memory' or 'cpu'")
+                elif isinstance(value, bool) or not _QUANTITY_RE.match(str(value)):
+                    errors.append(f"{where}: {path}.{section}.{name} is not a valid quantity: {value!r}")
+
+    def _validate_section(self, data: Any, path: str, errors: List[str]):
+        """Validate one config layer (defaults or a model entry) against the schema."""
+        if not isinstance(data, dict):
+            errors.append(f"{self.config_path.name}: {path} must be a mapping")
+            return
+        for key, value in data.items():
+            where = self._location(data, key)
+            expected = MODEL_FIELD_TYPES.get(key)
+            if expected is None:
+                errors.append(f"{where}: {path}.{key} is not a recognised setting")
+            elif not _matches(value, expected):
+                errors.append(f"{where}: {path}.{key} must be {_type_names(expected)}, got {value!r}")
+            elif key == 'parameters':
+                self._validate_parameters(value, f"{path}.parameters", errors)
+            elif key == 'resources':
+                self._validate_resources(value, f"{path}.resources", errors)
+            elif key == 'sizing':
+                self._validate_typed(value, f"{path}.sizing", SIZING_FIELD_TYPES, errors)
+                if isinstance(value.get('extra_memory_per_slot'), str) \
+                        and not _QUANTITY_RE.match(value['extra_memory_per_slot']):
+                    errors.append(f"{self._location(value, 'extra_memory_per_slot')}: "
+                                  f"{path}.sizing.extra_memory_per_slot is not a valid quantity")
+            elif key == 'weights':
+                self._validate_weights(value, f"{path}.weights", errors)
+            elif key == 'routing':
+                self._validate_routing(value, f"{path}.routing", errors)
+            elif key == 'autoscaling':
+                self._validate_autoscaling(value, f"{path}.autoscaling", errors)
+            elif key == 'startup':
+                self._validate_startup(value, f"{path}.startup", errors)
+            elif key == 'monitoring':
+                self._validate_typed(value, f"{path}.monitoring", MONITORING_FIELD_TYPES, errors)
+            elif key == 'cpu':
+                self._validate_cpu(value, f"{path}.cpu", errors)
+            elif key == 'draft':
+                self._validate_typed(value, f"{path}.draft", DRAFT_FIELD_TYPES, errors)
+                for field_name in DRAFT_FIELD_TYPES:
+                    if _matches(value.get(field_name), (int, float)) and value[field_name] < 0:
+                        errors.append(f"{self._location(value, field_name)}: {path}.draft.{field_name} "
+                                      f"must not be negative")
+
+    def _validate_cpu(self, cpu: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(cpu, path, CPU_FIELD_TYPES, errors)
+        if _matches(cpu.get('cores'), (int,)) and cpu['cores'] <= 0:
+            errors.append(f"{self._location(cpu, 'cores')}: {path}.cores must be positive")
+        if isinstance(cpu.get('numa'), str) and cpu['numa'] not in NUMA_MODES:
+            errors.append(f"{self._location(cpu, 'numa')}: {path}.numa must be one of {', '.join(NUMA_MODES)}")
+
+    def _validate_startup(self, startup: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(startup, path, STARTUP_FIELD_TYPES, errors)
+        for key in ('warmup_tokens', 'base_seconds', 'seconds_per_gib'):
+            if _matches(startup.get(key), (int, float)) and startup[key] <= 0:
+                errors.append(f"{self._location(startup, key)}: {path}.{key} must be positive")
+        if isinstance(startup.get('model_size'), str) and not _QUANTITY_RE.match(startup['model_size']):
+            errors.append(f"{self._location(startup, 'model_size')}: {path}.model_size is not a valid quantity")
+
+    def _validate_autoscaling(self, autoscaling: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(autoscaling, path, AUTOSCALING_FIELD_TYPES, errors)
+        if isinstance(autoscaling.get('engine'), str) and autoscaling['engine'] not in AUTOSCALING_ENGINES:
+            errors.append(f"{self._location(autoscaling, 'engine')}: {path}.engine must be one of "
+                          f"{', '.join(AUTOSCALING_ENGINES)}")
+        for key in ('min_replicas', 'max_replicas', *AUTOSCALING_METRICS):
+            if _matches(autoscaling.get(key), (int, float)) and autoscaling[key] <= 0:
+                errors.append(f"{self._location(autoscaling, key)}: {path}.{key} must be positive")
+        if _matches(autoscaling.get('kv_cache_usage'), (int, float)) and autoscaling['kv_cache_usage'] > 1:
+            errors.append(f"{self._location(autoscaling, 'kv_cache_usage')}: {path}.kv_cache_usage is a ratio "
+                          f"and must be at most 1")
+
+    def _validate_routing(self, routing: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(routing, path, ROUTING_FIELD_TYPES, errors)
+        if isinstance(routing.get('mode'), str) and routing['mode'] not in ROUTING_MODES:
+            errors.append(f"{self._location(routing, 'mode')}: {path}.mode must be one of {', '.join(ROUTING_MODES)}")
+        if _matches(routing.get('prefix_chars'), (int,)) and routing['prefix_chars'] <= 0:
+            errors.append(f"{self._location(routing, 'prefix_chars')}: {path}.prefix_chars must be positive")
+        if _matches(routing.get('load_factor'), (int, float)) and routing['load_factor'] < 1:
+            errors.append(f"{self._location(routing, 'load_factor')}: {path}.load_factor must be at least 1")
+
+    def _validate_weights(self, weights: Dict[str, Any], path: str, errors: List[str]):
+        self._validate_typed(weights, path, WEIGHTS_FIELD_TYPES, errors)
+        if isinstance(weights.get('mode'), str) and weights['mode'] not in WEIGHTS_MODES:
+            errors.append(f"{self._location(weights, 'mode')}: {path}.mode must be one of {', '.join(WEIGHTS_MODES)}")
+        if (isinstance(weights.get('pull_policy'), str)
+                and weights['pull_policy'] not in ('Always', 'IfNotPresent', 'Never')):
+            errors.append(f"{self._location(weights, 'pull_policy')}: {path}.pull_policy must be "
+                          f"Always, IfNotPresent or Never")
+
+    def _validate_template(self, template: Any, path: str, errors: List[str]):
+        if not isinstance(template, dict):
+            errors.append(f"{self.config_path.name}: {path} must be a mapping")
+            return
+        for key, value in template.items():
+            where = self._location(template, key)
+            if key not in ('parameters', 'resources') or not isinstance(value, dict):
+                errors.append(f"{where}: {path}.{key} must be a 'parameters' or 'resources' mapping")
+            elif key == 'parameters':
+                self._validate_parameters(value, f"{path}.parameters", errors)
+            else:
+                for size, resources in value.items():
+                    if isinstance(resources, dict):
+                        self._validate_resources(resources, f"{path}.resources.{size}", errors)
+                    else:
+                        errors.append(f"{self._location(value, size)}: {path}.resources.{size} must be a mapping")
+
+    def _resolve_template(self, template_name: str, resource_size: str) -> Dict[str, Any]:
+        """Return the parameters/resources layer for a template and size, memoized per pair."""
+        cache_key = (template_name, resource_size)
+        layer = self._template_layers.get(cache_key)
+        if layer is None:
+            template = self.config.get('templates', {}).get(template_name, {})
+            layer = {}
+            if 'parameters' in template:
+                layer['parameters'] = template['parameters']
+            if resource_size in template.get('resources', {}):
+                layer['resources'] = template['resources'][resource_size]
+            layer = _deep_merge({}, layer)
+            self._template_layers[cache_key] = layer
+        return layer
+
+    def _expand_variants(self, models: Dict[str, Any],
+                         errors: List[str]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Expand each model's ``variants`` list into catalog entries placed right after it.
+
+        A variant is a copy of its base entry with the quantization in
+        ``model_gguf_url``, ``model_file`` and ``description`` swapped, its own
+        source image, and any settings given in the variant merged over it.
+        Returns the expanded mapping and, per variant key, what it was made from.
+        """
+        expanded = _LocatedDict()
+        expanded.line = getattr(models, 'line', 0)
+        expanded.key_lines = dict(getattr(models, 'key_lines', {}))
+        variant_of: Dict[str, Dict[str, Any]] = {}
+        for model_key, model_config in models.items():
+            expanded[model_key] = model_config
+            variants = model_config.get('variants') if isinstance(model_config, dict) else None
+            if not isinstance(variants, list):
+                continue
+            path = f"models.{model_key}.variants"
+            where = self._location(model_config, 'variants')
+            base_quant = model_config.get('quant')
+            if base_quant is None:
+                match = _QUANT_RE.search(str(model_config.get('model_gguf_url', '')).rsplit('/', 1)[-1])
+                base_quant = match.group(1) if match else None
+
+            for index, item in enumerate(variants):
+                item_path = f"{path}[{index}]"
+                if isinstance(item, str):
+                    item = {'quant': item}
+                elif not isinstance(item, dict) or not isinstance(item.get('quant'), str):
+                    errors.append(f"{where}: {item_path} must be a quant name or a mapping with a quant")
+                    continue
+                before = len(errors)
+                self._validate_section(item, item_path, errors)
+                for key in ('variants', 'variant_service'):
+                    if key in item:
+                        errors.append(f"{self._location(item, key)}: {item_path}.{key} cannot be set on a variant")
+                if len(errors) > before:
+                    continue
+                quant = item['quant']
+                if base_quant is None and not ('model_gguf_url' in item and 'model_file' in item):
+                    errors.append(f"{where}: {item_path}: no quantization found in models.{model_key}.model_gguf_url; "
+                                  f"set models.{model_key}.quant, or model_gguf_url and model_file on the variant")
+                    continue
+                suffix = self._sanitize_name(quant)
+                variant_key = f"{model_key}-{suffix}"
+                if variant_key in models or variant_key in expanded:
+                    errors.append(f"{where}: {item_path} expands to models.{variant_key}, which already exists")
+                    continue
+
+                variant = _LocatedDict((key, value) for key, value in model_config.items()
+                                       if key not in ('variants', 'variant_service'))
+                variant.line = getattr(model_config, 'line', 0)
+                variant.key_lines = {**getattr(model_config, 'key_lines', {}), **getattr(item, 'key_lines', {})}
+                if base_quant is not None:
+                    for key in ('model_gguf_url', 'model_file', 'description'):
+                        if isinstance(variant.get(key), str):
+                            variant[key] = variant[key].replace(base_quant, quant)
+                variant['name'] = f"{model_config.get('name', model_key)} {quant}"
+                if 'model_source' in model_config:
+                    variant['model_source'] = f"{model_config['model_source']}-{suffix}"
+                # sizing.gguf is the base model's file; the variant is found by name in --gguf-dir
+                if isinstance(variant.get('sizing'), dict) and 'gguf' in variant['sizing']:
+                    variant['sizing'] = {k: v for k, v in variant['sizing'].items() if k != 'gguf'}
+                for key, value in item.items():
+                    if isinstance(value, dict) and isinstance(variant.get(key), dict):
+                        variant[key] = _deep_merge(variant[key], value)
+                    else:
+                        variant[key] = value
+
+                expanded[variant_key] = variant
+                expanded.key_lines[variant_key] = getattr(item, 'line', 0) or getattr(model_config, 'key_lines', {}).get('variants', 0)
+                variant_of[variant_key] = {
+                    'of': model_key,
+                    'base_quant': base_quant,
+                    'quant': quant,
+                    'memory_set': any(isinstance(quantities, dict) and 'memory' in quantities
+                                      for quantities in item.get('resources', {}).values()),
+                }
+        return expanded, variant_of
+
     def _merge_config(self, model_config: Dict[str, Any], model_key: str) -> Dict[str, Any]:
-        """Merge model config with defaults and templates."""
+        """Deep-merge model config over the template layer and global defaults."""
         # Start with global defaults
-        merged = self.config.get('defaults', {}).copy()
-        
+        merged = _deep_merge({}, self.config.get('defaults', {}))
+
         # Apply template if specified
         template_name = model_config.get('template')
-        if template_name and template_name in self.config.get('templates', {}):
-            template = self.config['templates'][template_name]
-            # Merge template parameters
-            if 'parameters' in template:
-                merged.setdefault('parameters', {}).update(template['parameters'])
-            # Merge template resources
-            if 'resources' in template:
-                resource_size = model_config.get('resource_size', 'small')
-                if resource_size in template['resources']:
-                    merged.setdefault('resources', {}).update(template['resources'][resource_size])
-        
+        if template_name:
+            merged = _deep_merge(merged, self._resolve_template(template_name, model_config.get('resource_size', 'small')))
+
         # Apply model-specific config
-        for key, value in model_config.items():
-            if isinstance(value, dict) and key in merged and isinstance(merged[key], dict):
-                merged[key].update(value)
-            else:
-                merged[key] = value
+        merged = _deep_merge(merged, model_config)
         
         # Add computed values
         merged['model_key'] = model_key
@@ -94,6 +1078,270 @@ class ModelGenerator:
         
         return merged
 
+    def _reserve_slot_memory(self, merged: Dict[str, Any]) -> bool:
+        """Without a GGUF header, grow memory by the per-slot estimate for each extra slot.
+
+        The model's ``sizing.extra_memory_per_slot`` wins over its profile's.
+        Returns False when there are extra slots but no estimate to size them.
+        """
+        serving = merged['serving']
+        extra_slots = serving.get('parallel', 1) - 1
+        if extra_slots <= 0:
+            return True
+        per_slot = merged.get('sizing', {}).get('extra_memory_per_slot', serving.get('extra_memory_per_slot'))
+        if per_slot is None:
+            return False
+        extra = extra_slots * parse_memory(per_slot)
+        for section in ('requests', 'limits'):
+            quantities = merged.get('resources', {}).get(section, {})
+            if 'memory' in quantities:
+                quantities['memory'] = _format_memory(parse_memory(quantities['memory']) + extra)
+        return True
+
+    def load_catalog(self) -> Dict[str, ModelSpec]:
+        """Validate and merge the whole catalog once, raising ConfigError with every problem found."""
+        if self._catalog is not None:
+            return self._catalog
+
+        errors: List[str] = []
+        if not isinstance(self.config, dict):
+            raise ConfigError([f"{self.config_path.name}: top level must be a mapping"])
+
+        defaults = self.config.get('defaults', {})
+        self._validate_section(defaults, 'defaults', errors)
+        if isinstance(defaults, dict) and 'variants' in defaults:
+            errors.append(f"{self._location(defaults, 'variants')}: defaults.variants must be set on a model")
+        templates = self.config.get('templates', {})
+        if isinstance(templates, dict):
+            for template_name, template in templates.items():
+                self._validate_template(template, f"templates.{template_name}", errors)
+        else:
+            errors.append(f"{self._location(self.config, 'templates')}: templates must be a mapping")
+            templates = {}
+        profiles = self.config.get('serving_profiles', {})
+        if isinstance(profiles, dict):
+            for profile_name, profile in profiles.items():
+                profile_path = f"serving_profiles.{profile_name}"
+                if not isinstance(profile, dict):
+                    errors.append(f"{self._location(profiles, profile_name)}: {profile_path} must be a mapping")
+                    continue
+                self._validate_typed(profile, profile_path, SERVING_PROFILE_FIELD_TYPES, errors)
+                for key in ('cache_type_k', 'cache_type_v'):
+                    if key in profile and profile[key] not in KV_CACHE_TYPE_BYTES:
+                        errors.append(f"{self._location(profile, key)}: {profile_path}.{key} must be one of "
+                                      f"{', '.join(KV_CACHE_TYPE_BYTES)}")
+                if isinstance(profile.get('flash_attn'), str) and profile['flash_attn'] not in ('on', 'off', 'auto'):
+                    errors.append(f"{self._location(profile, 'flash_attn')}: {profile_path}.flash_attn must be "
+                                  f"true, false, 'on', 'off' or 'auto'")
+                if ('extra_memory_per_slot' in profile
+                        and not _QUANTITY_RE.match(str(profile['extra_memory_per_slot']))):
+                    errors.append(f"{self._location(profile, 'extra_memory_per_slot')}: "
+                                  f"{profile_path}.extra_memory_per_slot is not a valid quantity")
+        else:
+            errors.append(f"{self._location(self.config, 'serving_profiles')}: serving_profiles must be a mapping")
+            profiles = {}
+        router = self.config.get('router', {})
+        if isinstance(router, dict):
+            self._validate_typed(router, 'router', ROUTER_FIELD_TYPES, errors)
+        else:
+            errors.append(f"{self._location(self.config, 'router')}: router must be a mapping")
+            router = {}
+        models = self.config.get('models') or {}
+        if not isinstance(models, dict):
+            raise ConfigError(errors + [f"{self._location(self.config, 'models')}: models must be a mapping"])
+
+        models, variant_of = self._expand_variants(models, errors)
+        catalog: Dict[str, ModelSpec] = {}
+        names_safe: Dict[str, str] = {}
+        for model_key, model_config in models.items():
+            path = f"models.{model_key}"
+            variant = variant_of.get(model_key)
+            if variant is not None:
+                # Checked along with its base entry and variants list
+                if variant['of'] not in catalog:
+                    continue
+            else:
+                before = len(errors)
+                self._validate_section(model_config, path, errors)
+                if len(errors) > before:
+                    continue
+
+            template_name = model_config.get('template')
+            if template_name is not None and template_name not in templates:
+                errors.append(f"{self._location(model_config, 'template')}: {path}.template '{template_name}' is not defined under templates")
+                continue
+            resource_size = model_config.get('resource_size')
+            if (template_name and resource_size is not None
+                    and resource_size not in templates[template_name].get('resources', {})):
+                errors.append(f"{self._location(model_config, 'resource_size')}: {path}.resource_size '{resource_size}' "
+                              f"is not defined for template '{template_name}'")
+                continue
+
+            draft_key = model_config.get('draft_model')
+            if draft_key is not None:
+                if draft_key not in models or draft_key == model_key:
+                    errors.append(f"{self._location(model_config, 'draft_model')}: {path}.draft_model "
+                                  f"'{draft_key}' must be another model in the catalog")
+                    continue
+                if isinstance(models[draft_key], dict) and 'draft_model' in models[draft_key]:
+                    errors.append(f"{self._location(model_config, 'draft_model')}: {path}.draft_model "
+                                  f"'{draft_key}' has a draft model of its own")
+                    continue
+
+            profile_name = model_config.get('serving_profile')
+            if profile_name is not None and profile_name not in profiles:
+                errors.append(f"{self._location(model_config, 'serving_profile')}: {path}.serving_profile "
+                              f"'{profile_name}' is not defined under serving_profiles")
+                continue
+
+            merged = self._merge_config(model_config, model_key)
+            where = self._location(models, model_key)
+            if 'name' not in merged:
+                errors.append(f"{where}: {path}.name is required")
+                continue
+            name_safe = merged['model_name_safe']
+            if name_safe in names_safe:
+                errors.append(f"{where}: {path} generates the same file names as models.{names_safe[name_safe]}")
+                continue
+            names_safe[name_safe] = model_key
+
+            # A model's requests merge over the default limits, which may be smaller
+            resources = merged.get('resources', {})
+            oversized = [
+                f"{where}: {path}.resources.requests.{name} ({resources['requests'][name]}) is greater than "
+                f"limits.{name} ({resources['limits'][name]}) after merging defaults and templates"
+                for name, parse in (('memory', parse_memory), ('cpu', parse_cpu))
+                if name in resources.get('requests', {}) and name in resources.get('limits', {})
+                and parse(resources['requests'][name]) > parse(resources['limits'][name])
+            ]
+            if oversized:
+                errors.extend(oversized)
+                continue
+
+            if (merged.get('weights', {}).get('mode') == 'node_cache'
+                    and _weights_url(merged) is None):
+                errors.append(f"{where}: {path}.weights.url is required for node_cache unless "
+                              f"model_gguf_url is an hf:// or https:// URL")
+                continue
+            if merged.get('weights', {}).get('mode') == 'node_cache' and not merged['weights'].get('prefetch', True):
+                errors.append(f"{where}: {path}.weights.prefetch cannot be false for node_cache: the cache "
+                              f"directory is created by root, so only the prefetch DaemonSet can fill it")
+                continue
+
+            autoscaling = merged.get('autoscaling')
+            if autoscaling is not None:
+                if not any(key in autoscaling for key in AUTOSCALING_METRICS):
+                    errors.append(f"{where}: {path}.autoscaling needs at least one target: "
+                                  f"{', '.join(AUTOSCALING_METRICS)}")
+                    continue
+                if autoscaling.get('min_replicas', 1) > autoscaling.get('max_replicas', 3):
+                    errors.append(f"{where}: {path}.autoscaling.min_replicas is greater than max_replicas")
+                    continue
+
+            serving = dict(_deep_merge({}, profiles[profile_name]), name=profile_name) if profile_name else {}
+            overrides = {key: merged['parameters'][key]
+                         for key in SERVING_PARAMETER_KEYS if key in merged.get('parameters', {})}
+            if overrides:
+                serving.update(overrides)
+                serving.setdefault('name', 'model parameters')
+            if serving:
+                merged['serving'] = serving
+
+            gguf_path = self._find_gguf(merged)
+            if gguf_path is not None:
+                try:
+                    merged.update(size_model(read_gguf_header(str(gguf_path)), merged))
+                except GGUFError as e:
+                    errors.append(f"{self._location(models, model_key)}: {path}: {e}")
+                    continue
+            else:
+                ratio = quant_ratio(variant['base_quant'], variant['quant']) if variant else None
+                if ratio is not None and not variant['memory_set']:
+                    merged.update(size_variant(merged, catalog[variant['of']].config, ratio))
+                # Scaled from a GGUF-sized base, whose KV cache already covers every slot
+                if 'serving' in merged and 'model_bytes' not in merged and not self._reserve_slot_memory(merged):
+                    # Every slot holds its own ctx_size of KV cache; without an estimate the pod would OOM
+                    errors.append(f"{where}: {path} serves {merged['serving']['parallel']} parallel slots "
+                                  f"but nothing says how much memory each extra slot needs: set "
+                                  f"sizing.extra_memory_per_slot, use a serving profile that sets it, "
+                                  f"or size the model from its GGUF (sizing.gguf)")
+                    continue
+            configured_threads = merged.get('parameters', {}).get('threads')
+            merged.update(size_cpu(merged))
+            threads = merged.get('parameters', {}).get('threads')
+            if configured_threads is not None and configured_threads > 0 and threads != configured_threads:
+                # Printed to stderr so that --build-matrix output stays valid JSON
+                print(f"Warning: {where}: {path}.parameters.threads ({configured_threads}) does not fit "
+                      f"the pod's CPU allotment; using {threads}", file=sys.stderr)
+
+            resources = merged.get('resources', {})
+            catalog[model_key] = ModelSpec(
+                key=model_key,
+                name_safe=name_safe,
+                config=merged,
+                parameters=Parameters(**merged.get('parameters', {})),
+                resources=Resources(**{
+                    section: ResourceQuantities(**{k: str(v) for k, v in resources[section].items()})
+                    for section in ('requests', 'limits') if section in resources
+                }),
+            )
+
+        default = router.get('default', [])
+        for key in [default] if isinstance(default, str) else default:
+            if key not in models:
+                errors.append(f"{self._location(router, 'default')}: router.default '{key}' is not a model")
+
+        # A/B: a model with variant_service shares one Service with its variants
+        for model_key, spec in catalog.items():
+            members = [key for key, variant in variant_of.items() if variant['of'] == model_key and key in catalog]
+            if spec.config.get('variant_service') and members:
+                for key in [model_key] + members:
+                    catalog[key].config['variant_group'] = spec.name_safe
+                spec.config['variant_members'] = [model_key] + members
+
+        # Drafts are attached once every model is sized, whatever their order in the file
+        for model_key, spec in catalog.items():
+            draft_key = spec.config.get('draft_model')
+            if draft_key in catalog:
+                catalog[model_key] = self._attach_draft(spec, catalog[draft_key])
+
+        if errors:
+            raise ConfigError(errors)
+        self._catalog = catalog
+        return catalog
+
+    def _attach_draft(self, spec: ModelSpec, draft: ModelSpec) -> ModelSpec:
+        """Record the draft model on a spec and grow its memory to hold both models."""
+        merged = spec.config
+        draft_config = draft.config
+        # The draft's own request covers its weights, KV cache and overhead
+        draft_memory = parse_memory(draft_config.get('resources', {}).get('requests', {}).get('memory', '4Gi'))
+        model_file = draft_config.get('model_file', '/mnt/models/model.gguf')
+        if merged.get('weights', {}).get('mode') == 'image_volume':
+            model_file = model_file.replace('/mnt/models', DRAFT_MOUNT_PATH, 1)
+        merged['draft_spec'] = {
+            'key': draft.key,
+            'name': draft_config['name'],
+            'model_source': draft_config['model_source'],
+            'model_file': model_file,
+            'url': _weights_url(draft_config),
+            'bytes': draft_config.get('model_bytes', draft_memory),
+        }
+        for section in ('requests', 'limits'):
+            quantities = merged.get('resources', {}).get(section, {})
+            if 'memory' in quantities:
+                quantities['memory'] = _format_memory(parse_memory(quantities['memory']) + draft_memory)
+        resources = merged.get('resources', {})
+        # Kubernetes rejects a pod whose memory request is above its limit
+        requests, limits = resources.get('requests', {}), resources.get('limits', {})
+        if 'memory' in requests and 'memory' in limits \
+                and parse_memory(requests['memory']) > parse_memory(limits['memory']):
+            limits['memory'] = requests['memory']
+        return dataclasses.replace(spec, resources=Resources(**{
+            section: ResourceQuantities(**{k: str(v) for k, v in resources[section].items()})
+            for section in ('requests', 'limits') if section in resources
+        }))
+
     def generate_containerfile(self, model_key: str, model_config: Dict[str, Any]) -> str:
         """Generate Containerfile content from shared template."""
         variables = {
@@ -101,7 +1349,17 @@ class ModelGenerator:
             'DESCRIPTION': model_config.get('description', f"{model_config['name']} model"),
             'MODEL_NAME_SAFE': model_config['model_name_safe'],
             'MODEL_NAME': model_config.get('name', model_config['model_name_safe']),
+            'EXTRA_ARGS': "",
+            'EXTRA_COPIES': "",
         }
+        draft = model_config.get('draft_spec')
+        if draft:
+            variables['EXTRA_ARGS'] = "\nARG DRAFT_SOURCE_NAME"
+            variables['EXTRA_COPIES'] = (
+                f"\n\n# Draft model for speculative decoding ({draft['name']})\n"
+                "ARG DRAFT_SOURCE_NAME\n"
+                "COPY --from=${DRAFT_SOURCE_NAME} --chown=0:0 --chmod=0755 /models /mnt/models"
+            )
         return self._render_template_file('Containerfile.template', variables)
 
     def generate_k8s_kustomization(self, model_key: str, model_config: Dict[str, Any]) -> tuple[str, str]:
@@ -110,10 +1368,15 @@ class ModelGenerator:
         params = model_config.get('parameters', {})
         registry_path = self.config.get('defaults', {}).get('registry_path', 'ghcr.io/kush-gupt')
         app_image_url = f"{registry_path}/{model_name_safe}-ramalama"
+        weights = model_config.get('weights', {})
+        weights_mode = weights.get('mode', 'baked')
+        if weights_mode != 'baked':
+            app_image_url = weights.get('runtime_image', f"{registry_path}/{RUNTIME_IMAGE_NAME}")
         
         # Render kustomization from shared template to avoid duplication
         variables = {
             'MODEL_NAME_SAFE': model_name_safe,
+            'NAMESPACE': _namespace(model_config),
             'MODEL_NAME': model_config.get('name', model_name_safe),
             'MODEL_FILE': model_config.get('model_file', '/mnt/models/model.gguf'),
             'APP_IMAGE_URL': app_image_url,
@@ -124,6 +1387,21 @@ class ModelGenerator:
             'TOP_P': params.get('top_p', 0.9),
             'CACHE_REUSE': params.get('cache_reuse', 256),
         }
+        serving = model_config.get('serving', {})
+        serving_literals, serving_args = self._serving_flags(serving)
+        draft_literals, draft_args = self._draft_flags(model_config)
+        serving_literals += draft_literals
+        # ctx_size is per slot; llama-server splits --ctx-size across --parallel slots
+        variables['CTX_SIZE'] = variables['CTX_SIZE'] * serving.get('parallel', 1)
+        variables['EXTRA_CONFIG_LITERALS'] = "".join(f"\n  - {literal}" for literal in serving_literals)
+        model_literals = [f"WEIGHTS_URL={_weights_url(model_config)}"] if weights_mode == 'node_cache' else []
+        variables['EXTRA_MODEL_LITERALS'] = "".join(f"\n  - {literal}" for literal in model_literals)
+        extra_resources = ['weights-prefetch.yaml'] if weights_mode == 'node_cache' else []
+        if 'autoscaling' in model_config:
+            extra_resources.append('autoscaling.yaml')
+        if model_config.get('monitoring', {}).get('service_monitor', True):
+            extra_resources.append('servicemonitor.yaml')
+        variables['EXTRA_RESOURCES'] = "".join(f"\n- {resource}" for resource in extra_resources)
         kustomization_yaml_templated = self._render_template_file('kustomization.template.yaml', variables)
         
         # Generate optional model resources patch
@@ -156,103 +1434,642 @@ class ModelGenerator:
                     f"            memory: \"{lim.get('memory', '8Gi')}\"",
                     f"            cpu: \"{lim.get('cpu', '4')}\"",
                 ]
+            if model_config.get('sizing_summary'):
+                lines.insert(0, f"# Sized from GGUF header: {model_config['sizing_summary']}")
             model_patch_templated = "\n".join(lines) + "\n"
-            kustomization_yaml_templated += (
-                "\n\n# Model-specific resource patches\n"
-                "patches:\n"
+
+        patches = []
+        if model_patch_templated:
+            patches.append(
                 "  - path: model-patch.yaml\n"
                 "    target:\n"
                 "      kind: Deployment\n"
                 "      name: ramalama-deployment\n"
             )
+        if serving_args:
+            patches.append(self._args_patch(serving_args, f"Serving profile: {serving['name']}"))
+        if draft_args:
+            patches.append(self._args_patch(draft_args, f"Speculative decoding with {model_config['draft_spec']['name']}"))
+        if weights_mode != 'baked':
+            patches.append(self._weights_patch(model_config, registry_path))
+        patches.append(self._startup_patch(model_config))
+        cpu_patch = self._cpu_patch(model_config)
+        if cpu_patch:
+            patches.append(cpu_patch)
+        if 'autoscaling' in model_config:
+            patches.append(
+                "  # Autoscaling: the autoscaler owns replicas\n"
+                "  - target:\n"
+                "      kind: Deployment\n"
+                "      name: ramalama-deployment\n"
+                "    patch: |-\n"
+                "      - op: remove\n"
+                "        path: /spec/replicas\n"
+            )
+        if model_config.get('variant_group'):
+            # On the pod template only: Deployment selectors are immutable
+            patches.append(
+                f"  # A/B: pods also back the {model_config['variant_group']}-variants Service\n"
+                "  - target:\n"
+                "      kind: Deployment\n"
+                "      name: ramalama-deployment\n"
+                "    patch: |-\n"
+                "      - op: add\n"
+                f"        path: /spec/template/metadata/labels/{VARIANT_GROUP_LABEL.replace('/', '~1')}\n"
+                f"        value: {model_config['variant_group']}\n"
+            )
+        if patches:
+            kustomization_yaml_templated += (
+                "\n\n# Model-specific resource patches\n"
+                "patches:\n" + "".join(patches)
+            )
 
         return kustomization_yaml_templated, model_patch_templated
 
-        # Legacy (unused) string-based template retained below for reference, will never execute
-        kustomization_yaml = f"""apiVersion: kustomize.config.k8s.io/v1beta1
-kind: Kustomization
-
-metadata:
-  name: ramalama-{model_name_safe}
-  annotations:
-    argocd.argoproj.io/sync-wave: "1"
-
-resources:
-  - ../base-model
-
-namePrefix: {model_name_safe}-
-
-commonLabels:
-  app.kubernetes.io/instance: {model_name_safe}
-  model: {model_name_safe}
-
-# Model-specific configuration
-configMapGenerator:
-  - name: model-config
-    behavior: replace
-    literals:
-      - MODEL_NAME={model_config.get('name', model_name_safe)}
-      - MODEL_FILE={model_config.get('model_file', '/mnt/models/model.gguf')}
-      - ALIAS={model_name_safe}-model
-
-# Model-specific image
-images:
-  - name: MODEL_IMAGE
-    newName: {app_image_url}
-    newTag: latest
-
-configMapGenerator:
-  - name: ramalama-config
-    behavior: merge
-    literals:
-      - CTX_SIZE={params.get('ctx_size', 4096)}
-      - THREADS={params.get('threads', 14)}
-      - TEMP={params.get('temp', 0.7)}
-      - TOP_K={params.get('top_k', 40)}
-      - TOP_P={params.get('top_p', 0.9)}
-      - CACHE_REUSE={params.get('cache_reuse', 256)}"""
-
-        # Generate model-specific patch if needed
+    def _serving_flags(self, serving: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Translate a serving profile into ramalama-config literals and extra llama-server args."""
+        literals: List[str] = []
+        args: List[str] = []
+        for key, env, flag in (
+            ('parallel', 'PARALLEL', '--parallel'),
+            ('batch_size', 'BATCH_SIZE', '--batch-size'),
+            ('ubatch_size', 'UBATCH_SIZE', '--ubatch-size'),
+            ('cache_type_k', 'CACHE_TYPE_K', '--cache-type-k'),
+            ('cache_type_v', 'CACHE_TYPE_V', '--cache-type-v'),
+        ):
+            if key in serving:
+                literals.append(f"{env}={serving[key]}")
+                args += [flag, f"$({env})"]
+        if 'flash_attn' in serving:
+            value = serving['flash_attn']
+            literals.append(f"FLASH_ATTN={value if isinstance(value, str) else ('on' if value else 'off')}")
+            args += ['--flash-attn', '$(FLASH_ATTN)']
+        if 'cont_batching' in serving:
+            args.append('--cont-batching' if serving['cont_batching'] else '--no-cont-batching')
+        if serving.get('mlock'):
+            args.append('--mlock')
+        if serving.get('no_mmap'):
+            args.append('--no-mmap')
+        return literals, args
+
+    def _draft_flags(self, model_config: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """ramalama-config literals and llama-server args loading the draft model."""
+        draft = model_config.get('draft_spec')
+        if not draft:
+            return [], []
+        tuning = {**DRAFT_DEFAULTS, **model_config.get('draft', {})}
+        literals = [
+            f"DRAFT_MODEL_FILE={draft['model_file']}",
+            f"DRAFT_MAX={tuning['max']}",
+            f"DRAFT_MIN={tuning['min']}",
+            f"DRAFT_P_MIN={tuning['p_min']}",
+        ]
+        args = [
+            '--model-draft', '$(DRAFT_MODEL_FILE)',
+            '--draft-max', '$(DRAFT_MAX)',
+            '--draft-min', '$(DRAFT_MIN)',
+            '--draft-p-min', '$(DRAFT_P_MIN)',
+            '--threads-draft', '$(THREADS)',
+        ]
+        if 'ctx_size' in tuning:
+            literals.append(f"CTX_SIZE_DRAFT={tuning['ctx_size']}")
+            args += ['--ctx-size-draft', '$(CTX_SIZE_DRAFT)']
+        return literals, args
+
+    def _weights_volume(self, model_config: Dict[str, Any], registry_path: str) -> List[str]:
+        """Pod volume lines (indented for a pod spec) holding the model's weights."""
+        weights = model_config['weights']
+        if weights['mode'] == 'image_volume':
+            image = weights.get('image', f"{registry_path}/{model_config['model_source']}:latest")
+            return [
+                "- name: model-weights",
+                "  image:",
+                f"    reference: {image}",
+                f"    pullPolicy: {weights.get('pull_policy', 'IfNotPresent')}",
+            ]
+        return [
+            "- name: model-weights",
+            "  hostPath:",
+            f"    path: {weights.get('host_path', NODE_CACHE_PATH)}",
+            "    type: DirectoryOrCreate",
+        ]
+
+    def _node_cache_container(self, fetch: bool, draft: Optional[Dict[str, Any]] = None) -> List[str]:
+        """initContainer lines that fill the node cache with MODEL_FILE (or the draft model's file), or wait for it."""
+        script = FETCH_WEIGHTS_SCRIPT if fetch else WAIT_WEIGHTS_SCRIPT
+        lines = [
+            f"- name: {'fetch' if fetch else 'wait-for'}-{'draft-' if draft else ''}weights",
+            "  image: MODEL_IMAGE",
+            "  command: [\"/bin/sh\", \"-c\"]",
+            "  args:",
+            "  - '" + script.replace("'", "''") + "'",
+            "  envFrom:",
+            "  - configMapRef:",
+            "      name: model-config",
+        ]
+        if draft:
+            # Same script; env takes precedence over envFrom
+            lines += [
+                "  env:",
+                "  - name: MODEL_FILE",
+                f"    value: {draft['model_file']}",
+                "  - name: WEIGHTS_URL",
+                f"    value: {draft['url']}",
+            ]
+        lines += [
+            "  volumeMounts:",
+            "  - name: model-weights",
+            "    mountPath: /mnt/models",
+        ]
+        if fetch:
+            # kubelet creates a missing hostPath owned by root; only root can populate it
+            lines += ["  securityContext:", "    runAsUser: 0"]
+        else:
+            lines.append("    readOnly: true")
+        return lines
+
+    def _weights_patch(self, model_config: Dict[str, Any], registry_path: str) -> str:
+        """Render an inline strategic-merge patch mounting the weights at /mnt/models."""
+        mode = model_config['weights']['mode']
+        # The model source image keeps the GGUF under /models, as copied by Containerfile.template
+        mount = ["  - name: model-weights", "    mountPath: /mnt/models", "    readOnly: true"]
+        if mode == 'image_volume':
+            mount.insert(2, "    subPath: models")
+        draft = model_config.get('draft_spec')
+        volumes = self._weights_volume(model_config, registry_path)
+        if draft and mode == 'image_volume':
+            mount += ["  - name: draft-weights", f"    mountPath: {DRAFT_MOUNT_PATH}",
+                      "    subPath: models", "    readOnly: true"]
+            volumes += [
+                "- name: draft-weights",
+                "  image:",
+                f"    reference: {registry_path}/{draft['model_source']}:latest",
+                f"    pullPolicy: {model_config['weights'].get('pull_policy', 'IfNotPresent')}",
+            ]
+        spec = ["containers:", "- name: ramalama", "  volumeMounts:"] + mount
+        if mode == 'node_cache':
+            spec += ["serviceAccountName: node-cache", "initContainers:"] + self._node_cache_container(fetch=False)
+            if draft:
+                spec += self._node_cache_container(fetch=False, draft=draft)
+        spec += ["volumes:"] + volumes
+        lines = [
+            "apiVersion: apps/v1",
+            "kind: Deployment",
+            "metadata:",
+            "  name: ramalama-deployment",
+            "spec:",
+            "  template:",
+            "    spec:",
+        ] + [f"      {line}" for line in spec]
+        return (
+            f"  # Weights: {mode.replace('_', ' ')}\n"
+            "  - target:\n"
+            "      kind: Deployment\n"
+            "      name: ramalama-deployment\n"
+            "    patch: |-\n" + "".join(f"      {line}\n" for line in lines)
+        )
+
+    def generate_weights_prefetch(self, model_key: str, model_config: Dict[str, Any]) -> str:
+        """DaemonSet that fills the node cache on every node, and the ServiceAccount its pods and the model's run as."""
+        registry_path = self.config.get('defaults', {}).get('registry_path', 'ghcr.io/kush-gupt')
+        lines = [
+            f"# Pre-fetches {model_config['name']} weights into the node cache on every node",
+            "apiVersion: v1",
+            "kind: ServiceAccount",
+            "metadata:",
+            "  name: node-cache",
+            "---",
+            f"# Lets the node-cache pods mount the hostPath and download as root under the {NODE_CACHE_SCC} SCC",
+            "apiVersion: rbac.authorization.k8s.io/v1",
+            "kind: RoleBinding",
+            "metadata:",
+            "  name: node-cache-scc",
+            "roleRef:",
+            "  apiGroup: rbac.authorization.k8s.io",
+            "  kind: ClusterRole",
+            f"  name: system:openshift:scc:{NODE_CACHE_SCC}",
+            "subjects:",
+            "- kind: ServiceAccount",
+            "  name: node-cache",
+            "---",
+            "apiVersion: apps/v1",
+            "kind: DaemonSet",
+            "metadata:",
+            "  name: weights-prefetch",
+            "spec:",
+            "  selector:",
+            "    matchLabels:",
+            "      app.kubernetes.io/component: weights-prefetch",
+            "  template:",
+            "    metadata:",
+            "      labels:",
+            "        app.kubernetes.io/component: weights-prefetch",
+            "    spec:",
+            "      serviceAccountName: node-cache",
+            "      initContainers:",
+        ] + [f"      {line}" for line in self._node_cache_container(fetch=True)] + [
+            f"      {line}" for line in (self._node_cache_container(fetch=True, draft=model_config['draft_spec'])
+                                         if 'draft_spec' in model_config else [])
+        ] + [
+            "      containers:",
+            "      - name: idle",
+            "        image: MODEL_IMAGE",
+            "        command: [\"/bin/sh\", \"-c\", \"trap 'exit 0' TERM; sleep infinity & wait\"]",
+            "        resources:",
+            "          requests:",
+            "            cpu: \"1m\"",
+            "            memory: \"16Mi\"",
+            "      volumes:",
+        ] + [f"      {line}" for line in self._weights_volume(model_config, registry_path)]
+        return "\n".join(lines) + "\n"
+
+    def _cpu_patch(self, model_config: Dict[str, Any]) -> str:
+        """Render an inline JSON6902 patch with the cpu block's thread and NUMA flags, if any."""
+        cpu_config = model_config.get('cpu', {})
+        ops: List[str] = []
+        notes: List[str] = []
+        if cpu_config.get('detect_threads'):
+            # sh -c runs the script with $0=llama-server and the Deployment's args as "$@"
+            ops += [
+                "- op: replace",
+                "  path: /spec/template/spec/containers/0/command",
+                "  value:",
+                "  - /bin/sh",
+                "  - -c",
+                f"  - {json.dumps(DETECT_THREADS_SCRIPT)}",
+                "  - llama-server",
+            ]
+            notes.append("threads from the cgroup at start")
+        elif cpu_config.get('performance'):
+            ops += [
+                "- op: add",
+                "  path: /spec/template/spec/containers/0/args/-",
+                "  value: '--threads-batch'",
+                "- op: add",
+                "  path: /spec/template/spec/containers/0/args/-",
+                "  value: '$(THREADS)'",
+            ]
+        if cpu_config.get('performance'):
+            notes.insert(0, f"{model_config['resources']['limits']['cpu']} dedicated cores, Guaranteed QoS")
+        if 'numa' in cpu_config:
+            ops += [
+                "- op: add",
+                "  path: /spec/template/spec/containers/0/args/-",
+                "  value: '--numa'",
+                "- op: add",
+                "  path: /spec/template/spec/containers/0/args/-",
+                f"  value: '{cpu_config['numa']}'",
+            ]
+            notes.append(f"NUMA {cpu_config['numa']}")
+        if not ops:
+            return ""
+        return (
+            f"  # CPU: {', '.join(notes)}\n"
+            "  - target:\n"
+            "      kind: Deployment\n"
+            "      name: ramalama-deployment\n"
+            "    patch: |-\n" + "".join(f"      {line}\n" for line in ops)
+        )
+
+    def _startup_patch(self, model_config: Dict[str, Any]) -> str:
+        """Render an inline JSON6902 patch adding a startupProbe sized to the model's load time.
+
+        The liveness probe only starts once the startupProbe passes, so large
+        models are no longer restarted mid-load. With warmup, llama-server's own
+        warmup pass runs (touching every mmap'd page), and the probe also
+        requires one short completion before the pod can become ready.
+        """
+        startup = model_config.get('startup', {})
+        if 'model_bytes' in model_config:
+            size_bytes, source = model_config['model_bytes'], "GGUF header"
+        elif 'model_size' in startup:
+            size_bytes, source = parse_memory(startup['model_size']), "startup.model_size"
+        else:
+            memory = model_config.get('resources', {}).get('requests', {}).get('memory', '4Gi')
+            size_bytes, source = parse_memory(memory), "memory request"
+        if 'draft_spec' in model_config:
+            # The memory request already includes the draft model
+            if source != "memory request":
+                size_bytes += model_config['draft_spec']['bytes']
+            source += ", with draft"
+        size_gib = size_bytes / (1024 * _MIB)
+        serving = model_config.get('serving', {})
+        warmup = startup.get('warmup', False)
+        # With lazy mmap loading /health is up before most pages are read
+        full_read = warmup or serving.get('no_mmap') or serving.get('mlock')
+        per_gib = startup.get('seconds_per_gib', 20) * (1 if full_read else 0.5)
+        budget = startup.get('base_seconds', 60) + math.ceil(size_gib * per_gib)
+        failures = max(3, math.ceil(budget / STARTUP_PROBE_PERIOD))
+
+        ops = []
+        if warmup:
+            request = json.dumps({'prompt': 'Hello', 'n_predict': startup.get('warmup_tokens', 8)})
+            check = ("curl -sf http://127.0.0.1:8080/health >/dev/null && "
+                     f"curl -sf -m 50 http://127.0.0.1:8080/completion -H 'Content-Type: application/json' "
+                     f"-d '{request}' >/dev/null")
+            ops += [
+                "- op: test",
+                f"  path: /spec/template/spec/containers/0/args/{NO_WARMUP_ARG_INDEX}",
+                "  value: '--no-warmup'",
+                "- op: remove",
+                f"  path: /spec/template/spec/containers/0/args/{NO_WARMUP_ARG_INDEX}",
+            ]
+            probe = ["exec:", "  command:", "  - /bin/sh", "  - -c", f"  - {json.dumps(check)}", "timeoutSeconds: 60"]
+        else:
+            probe = ["httpGet:", "  path: /health", "  port: 8080", "timeoutSeconds: 5"]
+        ops += [
+            "- op: add",
+            "  path: /spec/template/spec/containers/0/startupProbe",
+            "  value:",
+        ] + [f"    {line}" for line in probe + [
+            f"periodSeconds: {STARTUP_PROBE_PERIOD}",
+            f"failureThreshold: {failures}",
+        ]]
+        return (
+            f"  # Startup: {size_gib:.1f}Gi of weights ({source}), up to {failures * STARTUP_PROBE_PERIOD}s"
+            f"{' with warmup' if warmup else ''}\n"
+            "  - target:\n"
+            "      kind: Deployment\n"
+            "      name: ramalama-deployment\n"
+            "    patch: |-\n" + "".join(f"      {line}\n" for line in ops)
+        )
+
+    def generate_autoscaling(self, model_key: str, model_config: Dict[str, Any]) -> str:
+        """HPA or KEDA ScaledObject scaling the model's Deployment on llama-server metrics."""
+        autoscaling = model_config['autoscaling']
+        model_name_safe = model_config['model_name_safe']
+        engine = autoscaling.get('engine', 'keda')
+        targets = [(key, autoscaling[key]) for key in AUTOSCALING_METRICS if key in autoscaling]
+        window = autoscaling.get('scale_down_window', 300)
+        header = [
+            f"# Scales {model_config['name']} on llama-server metrics: "
+            + ", ".join(f"{key} {value}" for key, value in targets) + " per replica",
+        ]
+        if engine == 'hpa':
+            lines = header + [
+                "# Needs the pods metrics below in the custom metrics API (e.g. prometheus-adapter)",
+                "apiVersion: autoscaling/v2",
+                "kind: HorizontalPodAutoscaler",
+                "metadata:",
+                "  name: ramalama-autoscaler",
+                "spec:",
+                "  scaleTargetRef:",
+                "    apiVersion: apps/v1",
+                "    kind: Deployment",
+                "    name: ramalama-deployment",
+                f"  minReplicas: {autoscaling.get('min_replicas', 1)}",
+                f"  maxReplicas: {autoscaling.get('max_replicas', 3)}",
+                "  metrics:",
+            ]
+            for key, value in targets:
+                lines += [
+                    "  - type: Pods",
+                    "    pods:",
+                    "      metric:",
+                    f"        name: {AUTOSCALING_METRICS[key][0]}",
+                    "      target:",
+                    "        type: AverageValue",
+                    f"        averageValue: \"{_format_quantity(value)}\"",
+                ]
+            lines += [
+                "  behavior:",
+                "    scaleUp:",
+                "      stabilizationWindowSeconds: 0",
+                "    scaleDown:",
+                f"      stabilizationWindowSeconds: {window}",
+            ]
+            return "\n".join(lines) + "\n"
+
+        namespace = _namespace(model_config)
+        selector = _pod_selector(model_config)
+        lines = header + [
+            "apiVersion: keda.sh/v1alpha1",
+            "kind: ScaledObject",
+            "metadata:",
+            "  name: ramalama-autoscaler",
+            "spec:",
+            "  scaleTargetRef:",
+            # Kustomize's namePrefix does not rewrite references inside custom resources
+            f"    name: {model_name_safe}-ramalama-deployment",
+            f"  minReplicaCount: {autoscaling.get('min_replicas', 1)}",
+            f"  maxReplicaCount: {autoscaling.get('max_replicas', 3)}",
+            "  advanced:",
+            "    horizontalPodAutoscalerConfig:",
+            "      behavior:",
+            "        scaleDown:",
+            f"          stabilizationWindowSeconds: {window}",
+            "  triggers:",
+        ]
+        for key, value in targets:
+            lines += [
+                "  - type: prometheus",
+                "    metadata:",
+                f"      serverAddress: {autoscaling.get('prometheus_address', DEFAULT_PROMETHEUS_ADDRESS)}",
+                f"      namespace: {namespace}",
+                f"      query: '{AUTOSCALING_METRICS[key][1].format(selector=selector)}'",
+                f"      threshold: \"{value}\"",
+            ]
+            if 'trigger_auth' in autoscaling:
+                lines += [
+                    "      authModes: bearer",
+                    "    authenticationRef:",
+                    f"      name: {autoscaling['trigger_auth']}",
+                ]
+        return "\n".join(lines) + "\n"
+
+    def generate_service_monitor(self, model_key: str, model_config: Dict[str, Any]) -> str:
+        """ServiceMonitor scraping llama-server's /metrics through the model's Service."""
+        interval = model_config.get('monitoring', {}).get('interval', '15s')
+        lines = [
+            f"# Scrapes llama-server /metrics for {model_config['name']}",
+            "apiVersion: monitoring.coreos.com/v1",
+            "kind: ServiceMonitor",
+            "metadata:",
+            "  name: ramalama-metrics",
+            "spec:",
+            "  selector:",
+            "    matchLabels:",
+            # commonLabels does not reach selectors inside custom resources
+            f"      app.kubernetes.io/instance: {model_config['model_name_safe']}",
+            "      monitoring: \"enabled\"",
+            "  endpoints:",
+            "  - port: http-api",
+            "    path: /metrics",
+            f"    interval: {interval}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def generate_variant_service(self, model_key: str, model_config: Dict[str, Any]) -> Tuple[str, str]:
+        """Kustomization and Service spreading requests over a model and its quantization variants."""
+        group = model_config['variant_group']
+        kustomization = "\n".join([
+            "apiVersion: kustomize.config.k8s.io/v1beta1",
+            "kind: Kustomization",
+            "",
+            f"namespace: {_namespace(model_config)}",
+            "",
+            "resources:",
+            "- service.yaml",
+        ]) + "\n"
+        lines = [
+            f"# A/B comparison of {', '.join(model_config['variant_members'])}.",
+            "# Connections are spread evenly over the ready pods of every variant, so",
+            "# each variant's share of traffic follows its replica count.",
+            "apiVersion: v1",
+            "kind: Service",
+            "metadata:",
+            f"  name: {group}-variants",
+            "  labels:",
+            "    app.kubernetes.io/component: llm-server",
+            f"    {VARIANT_GROUP_LABEL}: {group}",
+            "spec:",
+            "  selector:",
+            f"    {VARIANT_GROUP_LABEL}: {group}",
+            "  ports:",
+            "    - name: http-api",
+            "      protocol: TCP",
+            "      port: 8080",
+            "      targetPort: 8080",
+            "  type: ClusterIP",
+        ]
+        return kustomization, "\n".join(lines) + "\n"
+
+    def generate_dashboard(self, model_key: str, model_config: Dict[str, Any]) -> str:
+        """Grafana dashboard for one model: throughput, queue, KV cache, TTFT and its serving settings."""
+        selector = _pod_selector(model_config)
+        router = f'model="{model_key}"'
+        panels = [
+            ("Generation throughput", "tokens/s generated, per pod", "short", [
+                (f"sum by (pod) (rate(llamacpp:tokens_predicted_total{{{selector}}}[$__rate_interval]))", "{{pod}}"),
+            ]),
+            ("Prompt processing", "Prompt tokens/s evaluated, per pod", "short", [
+                (f"sum by (pod) (rate(llamacpp:prompt_tokens_total{{{selector}}}[$__rate_interval]))", "{{pod}}"),
+            ]),
+            ("Queue depth", "Requests in slots and waiting for a free slot", "short", [
+                (f"sum(llamacpp:requests_processing{{{selector}}})", "processing"),
+                (f"sum(llamacpp:requests_deferred{{{selector}}})", "deferred"),
+            ]),
+            ("KV cache utilization", "Share of the KV cache in use, per pod", "percentunit", [
+                (f"max by (pod) (llamacpp:kv_cache_usage_ratio{{{selector}}})", "{{pod}}"),
+            ]),
+            ("Time to first token", "Streamed requests through the auto-discovery router", "s", [
+                (f"histogram_quantile(0.5, sum by (le) (rate(ramalama_router_ttft_seconds_bucket{{{router}}}"
+                 f"[$__rate_interval])))", "p50"),
+                (f"histogram_quantile(0.95, sum by (le) (rate(ramalama_router_ttft_seconds_bucket{{{router}}}"
+                 f"[$__rate_interval])))", "p95"),
+            ]),
+            ("Per-request speed", "Average tokens/s of a single request as reported by llama-server", "short", [
+                (f"avg(llamacpp:predicted_tokens_seconds{{{selector}}})", "generation"),
+                (f"avg(llamacpp:prompt_tokens_seconds{{{selector}}})", "prompt"),
+            ]),
+            ("Prompt cache hit ratio", "Share of prompt tokens served from llama-server's cache (router)", "percentunit", [
+                (f"sum(rate(ramalama_router_cached_prompt_tokens_total{{{router}}}[$__rate_interval])) / "
+                 f"sum(rate(ramalama_router_prompt_tokens_total{{{router}}}[$__rate_interval]))", "cached"),
+            ]),
+        ]
+        datasource = {'type': 'prometheus', 'uid': '${datasource}'}
+        dashboard_panels = []
+        for index, (title, description, unit, queries) in enumerate(panels):
+            dashboard_panels.append({
+                'id': index + 1,
+                'type': 'timeseries',
+                'title': title,
+                'description': description,
+                'datasource': datasource,
+                'gridPos': {'h': 8, 'w': 12, 'x': 12 * (index % 2), 'y': 8 * (index // 2)},
+                'fieldConfig': {'defaults': {'unit': unit}, 'overrides': []},
+                'targets': [{'datasource': datasource, 'expr': expr, 'legendFormat': legend, 'refId': chr(65 + i)}
+                            for i, (expr, legend) in enumerate(queries)],
+            })
+        # What this deployment runs with, to tell which parameters presets help
+        serving = model_config.get('serving', {})
+        settings = {key: value for key, value in model_config.get('parameters', {}).items()
+                    if key not in ('host', 'port')}
+        settings.update({key: value for key, value in serving.items() if key != 'name'})
+        rows = "".join(f"| {key} | {value} |\n" for key, value in sorted(settings.items()))
         resources = model_config.get('resources', {})
-        model_patch = ""
-        if resources:
-            model_patch = f"""apiVersion: apps/v1
-kind: Deployment
-metadata:
-  name: ramalama-deployment
-spec:
-  template:
-    spec:
-      containers:
-      - name: ramalama
-        resources:"""
-            if 'requests' in resources:
-                model_patch += f"""
-          requests:
-            memory: "{resources['requests'].get('memory', '4Gi')}"
-            cpu: "{resources['requests'].get('cpu', '2')}\""""
-            if 'limits' in resources:
-                model_patch += f"""
-          limits:
-            memory: "{resources['limits'].get('memory', '8Gi')}"
-            cpu: "{resources['limits'].get('cpu', '4')}\""""
-            
-            kustomization_yaml += f"""
-
-# Model-specific resource patches  
-patchesStrategicMerge:
-  - model-patch.yaml"""
-        
-        return kustomization_yaml, model_patch
+        content = (
+            f"**Serving profile:** {serving.get('name', 'none')}\n\n"
+            f"| setting | value |\n|---|---|\n{rows}\n"
+            + "".join(f"**{section}:** " + ", ".join(f"{k} {v}" for k, v in resources[section].items()) + "\n\n"
+                      for section in ('requests', 'limits') if section in resources)
+        )
+        dashboard_panels.append({
+            'id': len(panels) + 1,
+            'type': 'text',
+            'title': 'Serving settings',
+            'gridPos': {'h': 8, 'w': 12, 'x': 12 * (len(panels) % 2), 'y': 8 * (len(panels) // 2)},
+            'options': {'mode': 'markdown', 'content': content},
+        })
+        dashboard = {
+            'title': f"RamaLama / {model_config['name']}",
+            'uid': f"ramalama-{model_config['model_name_safe']}"[:40],
+            'tags': ['ramalama', 'llama-server'],
+            'timezone': 'browser',
+            'schemaVersion': 39,
+            'refresh': '30s',
+            'time': {'from': 'now-6h', 'to': 'now'},
+            'templating': {'list': [{
+                'name': 'datasource',
+                'label': 'Data source',
+                'type': 'datasource',
+                'query': 'prometheus',
+            }]},
+            'panels': dashboard_panels,
+        }
+        return json.dumps(dashboard, indent=2) + "\n"
+
+    def _args_patch(self, args: List[str], comment: str) -> str:
+        """Render an inline JSON6902 patch appending args to the ramalama container."""
+        ops = "".join(
+            "      - op: add\n"
+            "        path: /spec/template/spec/containers/0/args/-\n"
+            f"        value: '{arg}'\n"
+            for arg in args
+        )
+        return (
+            f"  # {comment}\n"
+            "  - target:\n"
+            "      kind: Deployment\n"
+            "      name: ramalama-deployment\n"
+            "    patch: |-\n" + ops
+        )
 
     def generate_lightspeed_overlay(self, model_key: str, model_config: Dict[str, Any]) -> str:
         """Generate OpenShift Lightspeed overlay from shared template."""
         variables = {
             'MODEL_NAME_SAFE': model_config['model_name_safe'],
-            'LIGHTSPEED_NAMESPACE': model_config.get('lightspeed_namespace', 'ramalama'),
+            'LIGHTSPEED_NAMESPACE': _namespace(model_config),
         }
         return self._render_template_file('lightspeed-overlay.template.yaml', variables)
 
+    def generate_router_outputs(self, catalog: Dict[str, ModelSpec]) -> Dict[Path, str]:
+        """Render the auto-discovery router's route table (and its copy of router.py) from the catalog."""
+        default = self.config.get('router', {}).get('default') or next(iter(catalog), None)
+        routes = {
+            'default': [default] if isinstance(default, str) else list(default or []),
+            'models': {},
+        }
+        for model_key, spec in catalog.items():
+            aliases = [f"{spec.name_safe}-model"]
+            if spec.config['name'] not in (model_key, *aliases):
+                aliases.append(spec.config['name'])
+            namespace = _namespace(spec.config)
+            routes['models'][model_key] = {
+                'aliases': aliases,
+                # Headless Service from k8s/models/base-model: resolves to every ready replica
+                'hosts': [f"{spec.name_safe}-ramalama-endpoints.{namespace}.svc.cluster.local:8080"],
+            }
+            if spec.config.get('routing'):
+                routes['models'][model_key]['routing'] = spec.config['routing']
+        overlay_dir = self.lightspeed_dir / "auto-discovery"
+        shebang, _, source = (self.scripts_dir / "router.py").read_text().partition('\n')
+        return {
+            overlay_dir / "routes.json": json.dumps(routes, indent=2) + "\n",
+            overlay_dir / "router.py": (f"{shebang}\n# Copied from scripts/router.py by "
+                                        f"generate-from-config.py; edit that file instead.\n{source}"),
+        }
+
     def generate_workflow_job(self, model_key: str, model_config: Dict[str, Any]) -> tuple[str, str]:
         """Generate GitHub workflow job content."""
         model_name_safe = model_config['model_name_safe']
@@ -332,7 +2149,7 @@ patchesStrategicMerge:
 
       - name: Build {model_config["name"]} app image
         run: |
-          sudo podman --storage-driver overlay --root='/mnt/docker' --runroot='/run/containers' build --squash-all \\
+          sudo podman --storage-driver overlay --root='/mnt/docker' --runroot='/run/containers' build --squash --timestamp 0 \\
             --format=oci \\
             --build-arg BASE_IMAGE_NAME=${{{{ steps.image_details.outputs.BASE_IMAGE_ARG }}}} \\
             --build-arg MODEL_SOURCE_NAME={model_config.get('model_source', 'unknown')} \\
@@ -348,96 +2165,352 @@ patchesStrategicMerge:
         
         return job_content, env_var_name
 
-    def generate_all(self):
-        """Generate all files for all models in the configuration."""
+    def generate_model_conf(self, model_key: str, model_config: Dict[str, Any]) -> str:
+        """Generate the shell-compatible model configuration file."""
+        params = model_config.get('parameters', {})
+        return f"""# Configuration for {model_config["name"]}
+MODEL_NAME="{model_config["name"]}"
+MODEL_DESCRIPTION="{model_config.get('description', '')}"
+MODEL_GGUF_URL="{model_config.get('model_gguf_url', '')}"
+MODEL_SOURCE="{model_config.get('model_source', '')}"
+MODEL_FILE="{model_config.get('model_file', '')}"
+CTX_SIZE={params.get('ctx_size', 4096)}
+THREADS={params.get('threads', 14)}
+TEMP={params.get('temp', 0.7)}
+TOP_K={params.get('top_k', 40)}
+TOP_P={params.get('top_p', 0.9)}
+CACHE_REUSE={params.get('cache_reuse', 256)}
+MAINTAINER="{model_config.get('maintainer', 'Unknown')}"
+CREATE_LIGHTSPEED_OVERLAY={str(model_config.get('create_lightspeed_overlay', False)).lower()}
+LIGHTSPEED_NAMESPACE="{_namespace(model_config)}"
+""" + (f'SERVING_PROFILE="{model_config["serving"]["name"]}"\n' if 'serving' in model_config else "") \
+          + (f'WEIGHTS_MODE="{model_config["weights"]["mode"]}"\n' if 'mode' in model_config.get('weights', {}) else "")
+
+    def render_model(self, model_key: str, model_config: Dict[str, Any]) -> Dict[Path, str]:
+        """Render every output file for a merged model config, keyed by destination path."""
+        model_name_safe = model_config['model_name_safe']
+        outputs: Dict[Path, str] = {}
+
+        weights = model_config.get('weights', {})
+        # Only baked models get their own app image; the others run the shared runtime image
+        if weights.get('mode', 'baked') == 'baked':
+            outputs[self.containerfiles_dir / f"Containerfile-{model_name_safe}"] = \
+                self.generate_containerfile(model_key, model_config)
+
+        kustomization_content, model_patch = self.generate_k8s_kustomization(model_key, model_config)
+        model_dir = self.k8s_dir / "models" / model_name_safe
+        outputs[model_dir / "kustomization.yaml"] = kustomization_content
+        if model_patch:
+            outputs[model_dir / "model-patch.yaml"] = model_patch
+        if weights.get('mode') == 'node_cache':
+            outputs[model_dir / "weights-prefetch.yaml"] = self.generate_weights_prefetch(model_key, model_config)
+        if 'autoscaling' in model_config:
+            outputs[model_dir / "autoscaling.yaml"] = self.generate_autoscaling(model_key, model_config)
+        if model_config.get('monitoring', {}).get('service_monitor', True):
+            outputs[model_dir / "servicemonitor.yaml"] = self.generate_service_monitor(model_key, model_config)
+        outputs[model_dir / "grafana-dashboard.json"] = self.generate_dashboard(model_key, model_config)
+        if model_config.get('variant_members'):
+            variants_dir = self.k8s_dir / "models" / f"{model_name_safe}-variants"
+            outputs[variants_dir / "kustomization.yaml"], outputs[variants_dir / "service.yaml"] = \
+                self.generate_variant_service(model_key, model_config)
+
+        if model_config.get('create_lightspeed_overlay', False):
+            outputs[self.lightspeed_dir / model_name_safe / "kustomization.yaml"] = \
+                self.generate_lightspeed_overlay(model_key, model_config)
+
+        outputs[self.models_dir / f"{model_name_safe}.conf"] = self.generate_model_conf(model_key, model_config)
+        return outputs
+
+    def _hash_templates(self) -> str:
+        """Hash every template file so template edits invalidate all models."""
+        digest = hashlib.sha256()
+        for path in sorted(self.templates_dir.rglob('*')):
+            if path.is_file():
+                digest.update(str(path.relative_to(self.templates_dir)).encode())
+                digest.update(b'\0')
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _hash_model_inputs(self, model_config: Dict[str, Any], templates_hash: str) -> str:
+        """Hash everything a model's rendered output depends on."""
+        payload = json.dumps({
+            'generator_version': GENERATOR_VERSION,
+            'templates': templates_hash,
+            'config': model_config,
+            'registry_path': self.config.get('defaults', {}).get('registry_path'),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _hash_base_image(self) -> str:
+        """Hash the base image's build inputs, for use when its registry digest is not known."""
+        digest = hashlib.sha256()
+        for relative_path in BASE_IMAGE_INPUTS:
+            path = self.repo_root / relative_path
+            digest.update(relative_path.encode())
+            digest.update(b'\0')
+            if path.is_file():
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def build_matrix(self, base_digest: Optional[str] = None,
+                     previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Compute the CI build matrices for models whose images need rebuilding.
+
+        A model's source fingerprint covers the GGUF its source image is
+        converted from. Its image fingerprint covers what the model image is
+        built from: the rendered Containerfile, the source (and draft source)
+        fingerprints and the base image. Models whose weights are not baked
+        (image_volume, node_cache) run the base image, so only their source
+        image is built and they never enter the models matrix. Runtime
+        settings from the merged config are applied by the kustomization, so
+        changing them does not rebuild images. ``previous`` is the ``state`` of the last successful
+        build: models whose fingerprint matches it are left out, and so are
+        source images whose GGUF did not change. Cache keys are derived from
+        the source fingerprint, so models converted from the same GGUF share
+        one Podman storage cache.
+        """
+        base = base_digest or self._hash_base_image()
+        if (previous or {}).get('generator_version') != GENERATOR_VERSION:
+            previous = {}
+        built = previous.get('models', {})
+
+        catalog = self.load_catalog()
+        source_fingerprints = {
+            model_key: hashlib.sha256(json.dumps({
+                'model_source': spec.config['model_source'],
+                'model_gguf_url': spec.config.get('model_gguf_url'),
+            }, sort_keys=True).encode()).hexdigest()
+            for model_key, spec in catalog.items()
+        }
+
+        models = []
+        sources = {}
+        state = {}
+        for model_key, spec in catalog.items():
+            model_config = spec.config
+            draft = model_config.get('draft_spec')
+            source_fingerprint = source_fingerprints[model_key]
+            source_key = source_fingerprint[:CACHE_KEY_DIGITS]
+            cache_prefix = f"model-storage-{source_key}-"
+            last = built.get(model_key, {})
+            # Without a GGUF URL there is nothing to convert: the source image must already be in the registry
+            if (last.get('source') != source_fingerprint and model_config.get('model_gguf_url')
+                    and model_config['model_source'] not in sources):
+                sources[model_config['model_source']] = {
+                    'key': model_key,
+                    'name': model_config['name'],
+                    'model_source': model_config['model_source'],
+                    'model_gguf_url': model_config['model_gguf_url'],
+                    'fingerprint': source_fingerprint,
+                    'cache_key': f"source-storage-{source_key}",
+                }
+            if model_config.get('weights', {}).get('mode', 'baked') != 'baked':
+                state[model_key] = {'source': source_fingerprint}
+                continue
+
+            fingerprint = hashlib.sha256(json.dumps({
+                'generator_version': GENERATOR_VERSION,
+                'containerfile': self.generate_containerfile(model_key, model_config),
+                'source': source_fingerprint,
+                'draft_source': source_fingerprints[draft['key']] if draft else None,
+                'base': base,
+            }, sort_keys=True).encode()).hexdigest()
+            state[model_key] = {'fingerprint': fingerprint, 'source': source_fingerprint}
+            if last.get('fingerprint') == fingerprint:
+                continue
+            models.append({
+                'key': model_key,
+                'name': model_config['name'],
+                'name_safe': spec.name_safe,
+                'model_source': model_config['model_source'],
+                'model_gguf_url': model_config.get('model_gguf_url', ''),
+                'containerfile': f"Containerfile-{spec.name_safe}",
+                'draft_source': catalog[draft['key']].config['model_source'] if draft else '',
+                'fingerprint': fingerprint,
+                'cache_key': f"{cache_prefix}{base[:CACHE_KEY_DIGITS]}",
+                'cache_restore_key': cache_prefix,
+            })
+
+        return {
+            'models': {'include': models},
+            'sources': {'include': list(sources.values())},
+            'state': {
+                'generator_version': GENERATOR_VERSION,
+                'base': base,
+                'models': state,
+            },
+        }
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the generation manifest, discarding it if written by another generator version."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('generator_version') != GENERATOR_VERSION:
+            # Its hashes are meaningless to this version, but its outputs still need cleaning up
+            return {'models': {key: {'outputs': entry.get('outputs', [])}
+                               for key, entry in manifest.get('models', {}).items()}}
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    def _is_current(self, path: Path, content: str) -> bool:
+        """Return True if the file on disk already holds exactly the rendered bytes."""
+        try:
+            with open(path, 'rb') as f:
+                return f.read() == content.encode()
+        except OSError:
+            return False
+
+    def _write_if_changed(self, path: Path, content: str) -> bool:
+        """Write rendered content only when it differs from disk, preserving mtimes otherwise."""
+        if self._is_current(path, content):
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return True
+
+    def _remove_output(self, path: Path):
+        """Delete a file that is no longer generated, and its directory once empty."""
+        path.unlink()
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+    def _render_job(self, job: Tuple[str, Dict[str, Any]]) -> Dict[Path, str]:
+        return self.render_model(*job)
+
+    def _render_models(self, jobs_list: List[Tuple[str, Dict[str, Any]]], jobs: int) -> List[Dict[Path, str]]:
+        """Render models serially or on a process pool, preserving input order."""
+        self._preload_templates()
+        if jobs <= 1 or len(jobs_list) <= 1:
+            return [self._render_job(job) for job in jobs_list]
+
+        workers = min(jobs, len(jobs_list))
+        chunksize = max(1, len(jobs_list) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._render_job, jobs_list, chunksize=chunksize))
+
+    def generate_all(self, incremental: bool = False, check: bool = False, jobs: int = 1) -> int:
+        """Generate all files for all models in the configuration.
+
+        With ``incremental`` only models whose inputs hash differs from the
+        manifest are rendered. Files the manifest lists that are no longer
+        generated are deleted. With ``check`` nothing is written or deleted and
+        the number of stale and orphaned files is returned. ``jobs`` > 1 renders
+        models on a process pool.
+        """
         if 'models' not in self.config:
             print("No models found in configuration")
-            return
+            return 0
 
-        print(f"Generating files for {len(self.config['models'])} models...")
-        
-        env_vars = []
-        workflow_jobs = []
+        catalog = self.load_catalog()
+        print(f"{'Checking' if check else 'Generating'} files for {len(catalog)} models...")
+
+        templates_hash = self._hash_templates()
+        manifest = self._load_manifest()
+        previous = manifest.get('models', {})
+        manifest_models = {}
         lightspeed_count = 0
-        
-        for model_key, model_config in self.config['models'].items():
-            print(f"Processing model: {model_key}")
-            
-            # Merge configuration
-            merged_config = self._merge_config(model_config, model_key)
-            model_name_safe = merged_config['model_name_safe']
-            
-            # Generate Containerfile
-            containerfile_content = self.generate_containerfile(model_key, merged_config)
-            containerfile_path = self.containerfiles_dir / f"Containerfile-{model_name_safe}"
-            with open(containerfile_path, 'w') as f:
-                f.write(containerfile_content)
-            print(f"  Generated: {containerfile_path}")
-            
-            # Generate k8s kustomization
-            kustomization_content, model_patch = self.generate_k8s_kustomization(model_key, merged_config)
-            model_dir = self.k8s_dir / "models" / model_name_safe
-            model_dir.mkdir(parents=True, exist_ok=True)
-            
-            kustomization_path = model_dir / "kustomization.yaml"
-            with open(kustomization_path, 'w') as f:
-                f.write(kustomization_content)
-            print(f"  Generated: {kustomization_path}")
-            
-            # Generate model patch if needed
-            if model_patch:
-                patch_path = model_dir / "model-patch.yaml"
-                with open(patch_path, 'w') as f:
-                    f.write(model_patch)
-                print(f"  Generated: {patch_path}")
-            
-            # Generate Lightspeed overlay if requested
+        skipped = 0
+        written = 0
+        removed = 0
+        stale = []
+
+        pending = []
+        for model_key, spec in catalog.items():
+            merged_config = spec.config
+            inputs_hash = self._hash_model_inputs(merged_config, templates_hash)
             if merged_config.get('create_lightspeed_overlay', False):
-                lightspeed_content = self.generate_lightspeed_overlay(model_key, merged_config)
-                lightspeed_model_dir = self.lightspeed_dir / model_name_safe
-                lightspeed_model_dir.mkdir(parents=True, exist_ok=True)
-                
-                lightspeed_path = lightspeed_model_dir / "kustomization.yaml"
-                with open(lightspeed_path, 'w') as f:
-                    f.write(lightspeed_content)
-                print(f"  Generated: {lightspeed_path}")
                 lightspeed_count += 1
-            
-            # Generate workflow job
-            job_content, env_var_name = self.generate_workflow_job(model_key, merged_config)
-            workflow_jobs.append(job_content)
-            env_vars.append(f"  {env_var_name}: {model_name_safe}-ramalama")
-            
-            # Generate model configuration file
-            config_content = f"""# Configuration for {merged_config["name"]}
-MODEL_NAME="{merged_config["name"]}"
-MODEL_DESCRIPTION="{merged_config.get('description', '')}"
-MODEL_GGUF_URL="{merged_config.get('model_gguf_url', '')}"
-MODEL_SOURCE="{merged_config.get('model_source', '')}"
-MODEL_FILE="{merged_config.get('model_file', '')}"
-CTX_SIZE={merged_config.get('parameters', {}).get('ctx_size', 4096)}
-THREADS={merged_config.get('parameters', {}).get('threads', 14)}
-TEMP={merged_config.get('parameters', {}).get('temp', 0.7)}
-TOP_K={merged_config.get('parameters', {}).get('top_k', 40)}
-TOP_P={merged_config.get('parameters', {}).get('top_p', 0.9)}
-CACHE_REUSE={merged_config.get('parameters', {}).get('cache_reuse', 256)}
-MAINTAINER="{merged_config.get('maintainer', 'Unknown')}"
-CREATE_LIGHTSPEED_OVERLAY={str(merged_config.get('create_lightspeed_overlay', False)).lower()}
-LIGHTSPEED_NAMESPACE="{merged_config.get('lightspeed_namespace', 'default')}"
-"""
-            config_path = self.models_dir / f"{model_name_safe}.conf"
-            with open(config_path, 'w') as f:
-                f.write(config_content)
-            print(f"  Generated: {config_path}")
+
+            entry = previous.get(model_key, {})
+            if (incremental and entry.get('hash') == inputs_hash
+                    and all((self.repo_root / p).exists() for p in entry.get('outputs', []))):
+                manifest_models[model_key] = entry
+                skipped += 1
+                continue
+            pending.append((model_key, merged_config, inputs_hash))
+
+        # Render everything first (optionally in parallel), then write in catalog order
+        rendered = self._render_models([(key, merged) for key, merged, _ in pending], jobs)
+
+        for (model_key, _, inputs_hash), outputs in zip(pending, rendered):
+            print(f"Processing model: {model_key}")
+            for path, content in outputs.items():
+                if check:
+                    if not self._is_current(path, content):
+                        stale.append(path)
+                        print(f"  Stale: {path}")
+                elif self._write_if_changed(path, content):
+                    written += 1
+                    print(f"  Generated: {path}")
+                else:
+                    print(f"  Unchanged: {path}")
+
+            manifest_models[model_key] = {
+                'hash': inputs_hash,
+                'outputs': sorted(str(p.relative_to(self.repo_root)) for p in outputs),
+            }
+
+        # Files an earlier run generated that no model generates any more
+        # (a removed model, or e.g. servicemonitor.yaml after service_monitor: false)
+        current = {p for entry in manifest_models.values() for p in entry['outputs']}
+        for relative_path in sorted({p for entry in previous.values() for p in entry.get('outputs', [])} - current):
+            path = self.repo_root / relative_path
+            if not path.is_file():
+                continue
+            if check:
+                stale.append(path)
+                print(f"  Orphaned: {path}")
+            else:
+                self._remove_output(path)
+                removed += 1
+                print(f"  Removed: {path}")
+
+        # Catalog-wide outputs are cheap and depend on every model, so always render them
+        for path, content in self.generate_router_outputs(catalog).items():
+            if check:
+                if not self._is_current(path, content):
+                    stale.append(path)
+                    print(f"  Stale: {path}")
+            elif self._write_if_changed(path, content):
+                written += 1
+                print(f"  Generated: {path}")
+
+        if check:
+            if stale:
+                print(f"\n{len(stale)} generated files are out of date; run {Path(sys.argv[0]).name} to regenerate")
+            else:
+                print("\nAll generated files are up to date")
+            return len(stale)
+
+        self._save_manifest({
+            'generator_version': GENERATOR_VERSION,
+            'templates': templates_hash,
+            'models': manifest_models,
+        })
 
         # Note: No workflow update needed with modular system
         print(f"\nNote: Using modular workflow - no manual workflow updates needed!")
         print("The workflow will automatically discover models from models.yaml")
         
         print("\nGeneration completed successfully!")
-        print(f"Generated files for {len(self.config['models'])} models")
+        print(f"Generated files for {len(catalog) - skipped} models ({written} files written)")
+        if removed:
+            print(f"Removed {removed} files no longer generated")
+        if skipped:
+            print(f"Skipped {skipped} unchanged models")
         if lightspeed_count > 0:
             print(f"Generated {lightspeed_count} OpenShift Lightspeed overlays")
+        return 0
 
     def _update_workflow(self, env_vars: list, workflow_jobs: list):
         """Update the GitHub workflow with new environment variables and jobs."""
@@ -482,6 +2555,24 @@ def main():
                        help='Path to the YAML configuration file')
     parser.add_argument('--repo-root', '-r', default='.',
                        help='Path to the repository root')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                       help='Only re-render models whose inputs changed since the last run')
+    parser.add_argument('--check', action='store_true',
+                       help='Do not write anything; exit non-zero if generated files are stale')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Number of worker processes used to render models (0 = one per CPU)')
+    parser.add_argument('--gguf-dir',
+                       help='Directory of local GGUF files used to size models (matched by model_file name)')
+    parser.add_argument('--allow-undefined', action='store_true',
+                       help='Render undefined template variables as empty strings instead of failing')
+    parser.add_argument('--list-template-variables', action='store_true',
+                       help='Print the variables each template requires and exit')
+    parser.add_argument('--build-matrix', action='store_true',
+                       help='Print the CI build matrices as JSON instead of generating files')
+    parser.add_argument('--base-digest',
+                       help='Base image digest for --build-matrix (default: hash of its build inputs)')
+    parser.add_argument('--previous-build',
+                       help='Build state of the last successful build; unchanged models are left out of --build-matrix')
     
     args = parser.parse_args()
     
@@ -493,8 +2584,33 @@ def main():
         print(f"Error: Configuration file not found: {config_path}")
         sys.exit(1)
     
-    generator = ModelGenerator(str(config_path), str(repo_root))
-    generator.generate_all()
+    generator = ModelGenerator(str(config_path), str(repo_root), strict_templates=not args.allow_undefined,
+                               gguf_dir=args.gguf_dir)
+    if args.list_template_variables:
+        for name, variables in generator.template_variables().items():
+            print(f"{name}: {', '.join(variables) if variables else '(none)'}")
+        return
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    try:
+        if args.build_matrix:
+            previous = None
+            if args.previous_build and os.path.exists(args.previous_build):
+                with open(args.previous_build, 'r') as f:
+                    previous = json.load(f)
+            print(json.dumps(generator.build_matrix(base_digest=args.base_digest, previous=previous)))
+            return
+        stale = generator.generate_all(incremental=args.incremental, check=args.check, jobs=jobs)
+    except ConfigError as e:
+        print(f"Error: invalid configuration in {config_path}:")
+        for error in e.errors:
+            print(f"  {error}")
+        sys.exit(1)
+    except TemplateError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if stale:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
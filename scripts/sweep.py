@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+
+"""
+sweep.py - Search llama-server parameters for one model and write the winner back to models.yaml
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import socket
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+import bench
+
+# Swept dimensions, in the order they are varied by coordinate search
+DIMENSIONS = ('threads', 'ctx_size', 'cache_reuse', 'parallel', 'batch_size')
+
+
+@dataclass(slots=True)
+class Candidate:
+    params: Dict[str, int]
+    report: Optional[Dict[str, Any]] = None
+    slo_violations: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def feasible(self) -> bool:
+        return self.report is not None and not self.slo_violations and self.report['summary']['errors'] == 0
+
+    @property
+    def throughput(self) -> float:
+        return self.report['summary']['output_tokens_per_s'] if self.report else 0.0
+
+
+def parse_int_list(text: str) -> List[int]:
+    try:
+        return [int(v) for v in text.split(',') if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a comma-separated list of integers, got '{text}'")
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """Parse a taskset-style CPU list such as '0-3,8' into CPU numbers."""
+    cpus = []
+    try:
+        for part in text.split(','):
+            first, _, last = part.strip().partition('-')
+            cpus.extend(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a CPU list such as 0-3,8, got '{text}'")
+    return sorted(set(cpus))
+
+
+def parse_slo(text: str) -> Tuple[str, float]:
+    """Parse 'ttft_ms.p95=2000' into (metric path, maximum)."""
+    metric, _, limit = text.partition('=')
+    try:
+        return metric.strip(), float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected METRIC=MAX (e.g. ttft_ms.p95=2000), got '{text}'")
+
+
+def metric_value(summary: Dict[str, Any], metric: str) -> Optional[float]:
+    value: Any = summary
+    for part in metric.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def check_slos(report: Dict[str, Any], slos: List[Tuple[str, float]]) -> List[str]:
+    violations = []
+    for metric, limit in slos:
+        value = metric_value(report['summary'], metric)
+        if value is None:
+            violations.append(f"{metric} not measured")
+        elif value > limit:
+            violations.append(f"{metric}={value} > {limit:g}")
+    return violations
+
+
+def rank(candidates: List[Candidate]) -> List[Candidate]:
+    """Feasible candidates by throughput (highest first), then the rest."""
+    return sorted(candidates, key=lambda c: (not c.feasible, -c.throughput))
+
+
+# ---------------------------------------------------------------------------
+# Backends: a local llama-server process per candidate, or the bench mock server
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def llama_server_command(binary: str, gguf: str, port: int, alias: str, params: Dict[str, int],
+                         serving: Dict[str, Any], generator) -> List[str]:
+    """Build a llama-server command line equivalent to the generated deployment for ``params``."""
+    command = [
+        binary, '--model', gguf, '--host', '127.0.0.1', '--port', str(port), '--jinja', '--alias', alias,
+        '--ctx-size', str(params['ctx_size'] * params['parallel']),
+        '--threads', str(params['threads']),
+        '--cache-reuse', str(params['cache_reuse']),
+    ]
+    literals, args = generator._serving_flags(dict(serving, parallel=params['parallel'],
+                                                   batch_size=params['batch_size'],
+                                                   ubatch_size=min(serving.get('ubatch_size', 512),
+                                                                   params['batch_size'])))
+    env = dict(literal.split('=', 1) for literal in literals)
+    return command + [re.sub(r"\$\((\w+)\)", lambda m: env[m.group(1)], arg) for arg in args]
+
+
+async def wait_healthy(url: str, timeout: float, process: asyncio.subprocess.Process):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        try:
+            status, _ = await bench.http_request(url.rsplit('/v1', 1)[0], path_suffix='/health', timeout=5)
+            if status == 200:
+                return
+        except (OSError, asyncio.TimeoutError, ValueError):
+            pass
+        if process.returncode is not None:
+            raise OSError(f"llama-server exited with status {process.returncode}")
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError(f"llama-server did not become healthy within {timeout:g}s")
+        await asyncio.sleep(1)
+
+
+async def evaluate(candidate: Candidate, args, bench_config: bench.BenchConfig, context: Dict[str, Any]):
+    """Start a backend configured for the candidate, benchmark it and record SLO violations."""
+    params = candidate.params
+    if args.mock:
+        mock = bench.mock_config_from_args(args)
+        mock.slots = params['parallel']
+        candidate.report = await bench.run_against_mock(bench.BenchConfig(**_bench_kwargs(bench_config)), mock)
+    else:
+        port = _free_port()
+        command = llama_server_command(args.llama_server, context['gguf'], port, bench_config.model, params,
+                                       context['serving'], context['generator'])
+        log = open(args.server_log, 'ab') if args.server_log else asyncio.subprocess.DEVNULL
+        try:
+            process = await asyncio.create_subprocess_exec(*command, stdout=log, stderr=log,
+                                                           preexec_fn=context['pin'])
+        except OSError as e:
+            candidate.error = f"cannot start {args.llama_server}: {e}"
+            if args.server_log:
+                log.close()
+            return
+        try:
+            config = bench.BenchConfig(**_bench_kwargs(bench_config))
+            config.url = f"http://127.0.0.1:{port}/v1"
+            await wait_healthy(config.url, args.startup_timeout, process)
+            candidate.report = await bench.run_benchmark(config)
+        except (OSError, TimeoutError) as e:
+            candidate.error = str(e)
+        finally:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            if args.server_log:
+                log.close()
+    if candidate.report is not None:
+        candidate.report['config']['parameters'] = params
+        candidate.slo_violations = check_slos(candidate.report, args.slo)
+
+
+def _bench_kwargs(config: bench.BenchConfig) -> Dict[str, Any]:
+    return {name: getattr(config, name) for name in config.__dataclass_fields__}
+
+
+# ---------------------------------------------------------------------------
+# Search strategies
+# ---------------------------------------------------------------------------
+
+async def grid_search(space: Dict[str, List[int]], run) -> List[Candidate]:
+    candidates = []
+    for values in itertools.product(*(space[d] for d in DIMENSIONS)):
+        candidates.append(await run(dict(zip(DIMENSIONS, values))))
+    return candidates
+
+
+async def coordinate_search(space: Dict[str, List[int]], start: Dict[str, int], run,
+                            max_rounds: int = 3) -> List[Candidate]:
+    """Vary one dimension at a time around the best point so far until nothing improves."""
+    evaluated: Dict[Tuple[int, ...], Candidate] = {}
+
+    async def measure(params: Dict[str, int]) -> Candidate:
+        key = tuple(params[d] for d in DIMENSIONS)
+        if key not in evaluated:
+            evaluated[key] = await run(params)
+        return evaluated[key]
+
+    best = await measure(start)
+    for _ in range(max_rounds):
+        improved = False
+        for dimension in DIMENSIONS:
+            for value in space[dimension]:
+                candidate = await measure(dict(best.params, **{dimension: value}))
+                if rank([candidate, best])[0] is candidate and candidate is not best:
+                    best, improved = candidate, True
+        if not improved:
+            break
+    return list(evaluated.values())
+
+
+# ---------------------------------------------------------------------------
+# Writing the result back to models.yaml
+# ---------------------------------------------------------------------------
+
+def _yaml_scalar(value: Any) -> str:
+    return yaml.safe_dump(value, default_flow_style=True).strip().removesuffix('...').strip()
+
+
+def _last_line(mapping: Any) -> int:
+    last = getattr(mapping, 'line', 0)
+    for key, line in getattr(mapping, 'key_lines', {}).items():
+        last = max(last, line, _last_line(mapping[key]) if isinstance(mapping[key], dict) else line)
+    return last
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def patch_parameters_text(text: str, model_key: str, patch: Dict[str, Any], loader) -> str:
+    """Rewrite one model's ``parameters`` block in models.yaml text, keeping comments and layout."""
+    config = yaml.load(text, Loader=loader)
+    model = config['models'][model_key]
+    lines = text.splitlines(keepends=True)
+    params = model.get('parameters')
+
+    if params is None:
+        end = _last_line(model)
+        indent = _indent(lines[min(model.key_lines.values()) - 1])
+        block = [f"{indent}parameters:\n"] + [f"{indent}  {k}: {_yaml_scalar(v)}\n" for k, v in patch.items()]
+        if lines and not lines[end - 1].endswith('\n'):
+            lines[end - 1] += '\n'
+        return "".join(lines[:end] + block + lines[end:])
+
+    missing = []
+    for key, value in patch.items():
+        if key not in params.key_lines:
+            missing.append(key)
+            continue
+        index = params.key_lines[key] - 1
+        lines[index] = re.sub(
+            rf"^(\s*{re.escape(key)}:\s*)([^#\r\n]*?)(\s*#[^\r\n]*)?(\r?\n)?$",
+            lambda m: m.group(1) + _yaml_scalar(value) + (m.group(3) or '') + (m.group(4) or ''),
+            lines[index],
+        )
+    if missing:
+        last = max(params.key_lines.values())
+        indent = _indent(lines[last - 1])
+        if not lines[last - 1].endswith('\n'):
+            lines[last - 1] += '\n'
+        lines[last:last] = [f"{indent}{k}: {_yaml_scalar(patch[k])}\n" for k in missing]
+    return "".join(lines)
+
+
+def validate_patched(generator_module, config_path: Path, repo_root: Path, text: str, model_key: str):
+    """Run the patched file through the generator's validation and merge; returns the merged config."""
+    generator = generator_module.ModelGenerator(str(config_path), str(repo_root))
+    generator.config = yaml.load(text, Loader=generator_module._LineLoader)
+    generator._catalog = None
+    return generator.load_catalog()[model_key].config
+
+
+def memory_shortfall(generator_module, merged: Dict[str, Any], gguf: str) -> Optional[str]:
+    """Say why the merged config's memory limit cannot hold its weights and KV cache, or None if it can."""
+    info = generator_module.read_gguf_header(gguf)
+    needed = generator_module.size_model(info, merged)['resources']['requests']['memory']
+    limit = merged.get('resources', {}).get('limits', {}).get('memory')
+    if limit is None or generator_module.parse_memory(needed) <= generator_module.parse_memory(limit):
+        return None
+    slots = merged.get('serving', {}).get('parallel', 1)
+    return (f"{slots} slot(s) of ctx_size {merged['parameters'].get('ctx_size')} need about {needed} "
+            f"but the memory limit is {limit}")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def build_space(args, current: Dict[str, int], max_threads: Optional[int]) -> Dict[str, List[int]]:
+    space = {}
+    for dimension in DIMENSIONS:
+        values = getattr(args, dimension)
+        space[dimension] = values if values else [current[dimension]]
+    if max_threads is not None:
+        # The generator caps threads at the pod's CPU allotment, so larger values would never be deployed
+        skipped = [t for t in space['threads'] if t > max_threads]
+        if skipped:
+            print(f"Skipping threads {','.join(map(str, skipped))}: the pod is allotted {max_threads} CPUs",
+                  file=sys.stderr)
+        space['threads'] = [t for t in space['threads'] if t <= max_threads] or [max_threads]
+    return space
+
+
+def pinned_cpus(cpuset: Optional[List[int]], allotment: Optional[int]) -> Optional[List[int]]:
+    """CPUs to run llama-server on so that it sees as many cores as the pod, or None to leave it unpinned."""
+    if cpuset:
+        return cpuset
+    if allotment is None or not hasattr(os, 'sched_getaffinity'):
+        return None
+    available = sorted(os.sched_getaffinity(0))
+    if len(available) < allotment:
+        print(f"Warning: the pod is allotted {allotment} CPUs but only {len(available)} are available here",
+              file=sys.stderr)
+    return available[:allotment]
+
+
+def print_table(candidates: List[Candidate]):
+    header = "".join(f"{d:>12}" for d in DIMENSIONS) + f"{'tok/s':>10}{'ttft p95':>10}{'itl p95':>9}  status"
+    print(header, file=sys.stderr)
+    for candidate in candidates:
+        summary = candidate.report['summary'] if candidate.report else {}
+        ttft = summary.get('ttft_ms', {}).get('p95', '-')
+        itl = summary.get('inter_token_ms', {}).get('p95', '-')
+        if candidate.error:
+            status = f"failed: {candidate.error}"
+        elif candidate.feasible:
+            status = "ok"
+        else:
+            status = "; ".join(candidate.slo_violations) or f"{summary.get('errors')} errors"
+        print("".join(f"{candidate.params[d]:>12}" for d in DIMENSIONS)
+              + f"{candidate.throughput:>10.1f}{ttft:>10}{itl:>9}  {status}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep llama-server parameters for one model')
+    parser.add_argument('model', help='Model key from models.yaml')
+    parser.add_argument('--config', '-c', default='models/models.yaml', help='Path to the YAML configuration file')
+    parser.add_argument('--repo-root', '-r', default='.', help='Path to the repository root')
+    parser.add_argument('--strategy', choices=('grid', 'coordinate'), default='coordinate',
+                        help='Try every combination, or vary one dimension at a time from the current settings')
+    for dimension in DIMENSIONS:
+        parser.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, type=parse_int_list,
+                            help=f"Comma-separated {dimension} values to try (default: current value)")
+    parser.add_argument('--slo', type=parse_slo, action='append',
+                        help='Latency SLO as METRIC=MAX_MS, e.g. ttft_ms.p95=2000 (repeatable)')
+    parser.add_argument('--write', action='store_true', help="Write the winning values into the model's parameters")
+    parser.add_argument('--output', '-o', help='Write every candidate report to this JSON file')
+
+    backend = parser.add_argument_group('backend')
+    backend.add_argument('--gguf', help='Local GGUF file (default: sizing.gguf or the --gguf-dir match)')
+    backend.add_argument('--gguf-dir', help='Directory of local GGUF files, matched by model_file name')
+    backend.add_argument('--llama-server', default='llama-server', help='llama-server binary to launch')
+    backend.add_argument('--startup-timeout', type=float, default=600.0, help='Seconds to wait for /health')
+    backend.add_argument('--server-log', help='Append llama-server output to this file')
+    backend.add_argument('--cpuset', type=parse_cpu_list,
+                         help="CPUs to pin llama-server to, as for taskset (default: as many CPUs as the "
+                              "model's pod is allotted)")
+    backend.add_argument('--no-pin', action='store_true', help='Let llama-server run on every CPU')
+    backend.add_argument('--mock', action='store_true',
+                         help='Use the bench mock server (only parallel changes its behaviour)')
+    bench.add_mock_arguments(parser)
+    bench.add_load_arguments(parser)
+
+    args = parser.parse_args()
+    args.slo = args.slo or [('ttft_ms.p95', 2000.0)]
+
+    repo_root = Path(args.repo_root).resolve()
+    config_path = repo_root / args.config
+    generator_module = bench.load_generator()
+    generator = generator_module.ModelGenerator(str(config_path), str(repo_root), gguf_dir=args.gguf_dir)
+    try:
+        catalog = generator.load_catalog()
+    except generator_module.ConfigError as e:
+        print(f"Error: invalid configuration in {config_path}:\n  " + "\n  ".join(e.errors))
+        sys.exit(1)
+    if args.model not in catalog:
+        print(f"Error: model '{args.model}' not found in {config_path}")
+        sys.exit(1)
+    spec = catalog[args.model]
+    serving = spec.config.get('serving', {})
+    current = {
+        'threads': spec.parameters.threads,
+        'ctx_size': spec.parameters.ctx_size,
+        'cache_reuse': spec.parameters.cache_reuse,
+        'parallel': serving.get('parallel', spec.parameters.parallel),
+        'batch_size': serving.get('batch_size', spec.parameters.batch_size),
+    }
+
+    allotment = generator_module.cpu_allotment(spec.config)
+    context = {'generator': generator, 'serving': serving, 'gguf': args.gguf, 'pin': None}
+    cpus = None if args.mock or args.no_pin else pinned_cpus(args.cpuset, allotment)
+    if cpus is not None:
+        if not hasattr(os, 'sched_setaffinity'):
+            print("Error: --cpuset needs a platform with sched_setaffinity (Linux)")
+            sys.exit(1)
+        print(f"Pinning llama-server to CPUs {','.join(map(str, cpus))}", file=sys.stderr)
+        context['pin'] = lambda: os.sched_setaffinity(0, cpus)
+    if not args.mock and not context['gguf']:
+        found = generator._find_gguf(spec.config)
+        if found is None:
+            print("Error: no local GGUF for this model; pass --gguf, --gguf-dir or --mock")
+            sys.exit(1)
+        context['gguf'] = str(found)
+
+    bench_config = bench.bench_config_from_args(args, '', f"{spec.name_safe}-model")
+    space = build_space(args, current, allotment)
+
+    async def run(params: Dict[str, int]) -> Candidate:
+        candidate = Candidate(params=params)
+        print(f"Benchmarking {params}", file=sys.stderr)
+        await evaluate(candidate, args, bench_config, context)
+        return candidate
+
+    if args.strategy == 'grid':
+        candidates = asyncio.run(grid_search(space, run))
+    else:
+        # Start from the deployed settings so every dimension not swept stays at its deployed value
+        candidates = asyncio.run(coordinate_search(space, dict(current), run))
+
+    ranked = rank(candidates)
+    print_table(ranked)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([{'parameters': c.params, 'feasible': c.feasible, 'slo_violations': c.slo_violations,
+                        'error': c.error, 'report': c.report} for c in ranked], f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    best = ranked[0]
+    if not best.feasible:
+        print("\nNo candidate met the SLO; models.yaml left unchanged.", file=sys.stderr)
+        sys.exit(1)
+
+    # Every dimension the winner was measured with that differs from the current effective value
+    patch = {d: best.params[d] for d in DIMENSIONS if best.params[d] != current[d]}
+    if not patch:
+        print("\nCurrent settings are already the best measured; nothing to change.", file=sys.stderr)
+        return
+
+    baseline = next((c for c in candidates if c.params == current), None)
+    versus = f" vs {baseline.throughput:.1f} tok/s now" if baseline and baseline.report else ""
+    print(f"\nProposed patch for {args.model} ({best.throughput:.1f} tok/s{versus}):")
+    print(yaml.safe_dump({'models': {args.model: {'parameters': patch}}}, sort_keys=False), end='')
+
+    with open(config_path) as f:
+        text = f.read()
+    patched = patch_parameters_text(text, args.model, patch, generator_module._LineLoader)
+    try:
+        merged = validate_patched(generator_module, config_path, repo_root, patched, args.model)
+    except generator_module.ConfigError as e:
+        print("Error: patched configuration does not validate:\n  " + "\n  ".join(e.errors))
+        sys.exit(1)
+    print(f"Effective parameters after merge: {json.dumps(merged['parameters'], sort_keys=True)}", file=sys.stderr)
+    shortfall = memory_shortfall(generator_module, merged, context['gguf']) if context['gguf'] else None
+    if shortfall:
+        print(f"Error: the patched deployment would not fit in memory: {shortfall}. Raise the model's "
+              f"memory, set sizing.gguf so it is sized from the GGUF, or sweep smaller values.")
+        sys.exit(1)
+
+    if args.write:
+        with open(config_path, 'w') as f:
+            f.write(patched)
+        print(f"Updated {config_path}; run scripts/generate-from-config.py to regenerate manifests.",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Make the scripts/ directory importable and expose the generator module."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import bench  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def generator():
+    return bench.load_generator()
+
+
+@pytest.fixture
+def make_generator(generator, tmp_path):
+    """Return a factory building a ModelGenerator for a models.yaml text, using the repo's templates."""
+    def make(config_text: str, **kwargs):
+        config_path = tmp_path / "models.yaml"
+        config_path.write_text(config_text)
+        return generator.ModelGenerator(str(config_path), str(REPO_ROOT), **kwargs)
+    return make
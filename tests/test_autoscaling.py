@@ -0,0 +1,50 @@
+"""Autoscaling on llama-server metrics with KEDA or an HPA."""
+
+import pytest
+import yaml
+
+
+def model(autoscaling: str) -> str:
+    return ("models:\n  m:\n    name: \"M\"\n    model_gguf_url: \"hf://org/repo/m.gguf\"\n"
+            "    autoscaling:\n" + autoscaling)
+
+
+def test_keda_scaled_object(make_generator):
+    gen = make_generator(model("      max_replicas: 4\n      requests_deferred: 1\n"
+                               "      kv_cache_usage: 0.85\n      trigger_auth: keda-prometheus\n"))
+    spec = gen.load_catalog()['m']
+    scaled = yaml.safe_load(gen.generate_autoscaling('m', spec.config))
+    assert scaled['kind'] == "ScaledObject"
+    assert scaled['spec']['scaleTargetRef'] == {'name': "m-ramalama-deployment"}
+    assert (scaled['spec']['minReplicaCount'], scaled['spec']['maxReplicaCount']) == (1, 4)
+    deferred, kv_cache = scaled['spec']['triggers']
+    assert deferred['metadata']['query'].startswith("sum(llamacpp:requests_deferred{")
+    assert deferred['metadata']['threshold'] == "1"
+    assert kv_cache['metadata']['threshold'] == "0.85"
+    assert kv_cache['authenticationRef'] == {'name': "keda-prometheus"}
+
+    kustomization, _ = gen.generate_k8s_kustomization('m', spec.config)
+    assert "- autoscaling.yaml" in kustomization
+    assert "path: /spec/replicas" in kustomization
+
+
+def test_hpa(make_generator):
+    gen = make_generator(model("      engine: hpa\n      requests_processing: 3\n      scale_down_window: 600\n"))
+    hpa = yaml.safe_load(gen.generate_autoscaling('m', gen.load_catalog()['m'].config))
+    assert hpa['kind'] == "HorizontalPodAutoscaler"
+    assert hpa['spec']['metrics'] == [{'type': 'Pods', 'pods': {
+        'metric': {'name': "llamacpp_requests_processing"},
+        'target': {'type': 'AverageValue', 'averageValue': "3"},
+    }}]
+    assert hpa['spec']['behavior']['scaleDown'] == {'stabilizationWindowSeconds': 600}
+
+
+@pytest.mark.parametrize("autoscaling, error", [
+    ("      max_replicas: 4\n", "models.m.autoscaling needs at least one target"),
+    ("      min_replicas: 5\n      requests_deferred: 1\n", "min_replicas is greater than max_replicas"),
+    ("      kv_cache_usage: 85\n", "kv_cache_usage is a ratio"),
+])
+def test_invalid_autoscaling(generator, make_generator, autoscaling, error):
+    with pytest.raises(generator.ConfigError) as e:
+        make_generator(model(autoscaling)).load_catalog()
+    assert error in "\n".join(e.value.errors)
@@ -0,0 +1,77 @@
+"""Benchmark statistics and the client against the mock llama-server."""
+
+import asyncio
+
+import pytest
+
+import bench
+
+
+def test_percentile_interpolates():
+    assert bench.percentile([], 50) == 0.0
+    assert bench.percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert bench.percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert bench.percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_describe_scales():
+    assert bench.describe([]) == {}
+    stats = bench.describe([0.1, 0.2, 0.3], 1000)
+    assert stats["min"] == 100.0
+    assert stats["p50"] == 200.0
+    assert stats["max"] == 300.0
+    assert stats["mean"] == pytest.approx(200.0)
+
+
+def test_summarize_decode_speed_excludes_first_token():
+    results = [
+        # Streamed: 11 tokens, first at 0.5s, last at 1.5s -> 10 tokens decoded in 1s
+        bench.RequestResult(prompt_tokens=8, completion_tokens=11, ttft=0.5, latency=1.5),
+        # Not streamed: end-to-end speed
+        bench.RequestResult(prompt_tokens=8, completion_tokens=20, latency=2.0),
+        bench.RequestResult(prompt_tokens=8, error="HTTP 503: busy"),
+    ]
+    summary = bench.summarize(results, 2.0)
+    assert summary["requests"] == 3
+    assert summary["errors"] == 1
+    assert summary["error_samples"] == ["HTTP 503: busy"]
+    assert summary["completion_tokens"] == 31
+    assert summary["request_tokens_per_s"]["min"] == 10.0
+    assert summary["request_tokens_per_s"]["max"] == 10.0
+
+
+def test_compare_reports_percent_change():
+    base = {"summary": {"output_tokens_per_s": 100.0, "requests_per_s": 2.0, "errors": 0,
+                        "ttft_ms": {"p50": 200.0, "p95": 400.0, "p99": 500.0}}}
+    cand = {"summary": {"output_tokens_per_s": 150.0, "requests_per_s": 2.0, "errors": 0,
+                        "ttft_ms": {"p50": 100.0, "p95": 400.0, "p99": 500.0}}}
+    rows = {name: change for name, _, _, change in bench.compare(base, cand)}
+    assert rows["output_tokens_per_s"] == 50.0
+    assert rows["ttft_ms.p50"] == -50.0
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_benchmark_against_mock(stream):
+    config = bench.BenchConfig(url="", model="mock-model", concurrency=2, requests=4,
+                               prompt_tokens="fixed:16", max_tokens=5, stream=stream, timeout=10.0)
+    mock = bench.MockServerConfig(ttft_ms=5.0, itl_ms=1.0, slots=2)
+    summary = asyncio.run(bench.run_against_mock(config, mock))["summary"]
+    assert summary["errors"] == 0
+    assert summary["completion_tokens"] == 4 * 5
+    assert summary["prompt_tokens"] == 4 * 16
+    assert bool(summary["ttft_ms"]) is stream
+
+
+def test_stalled_stream_times_out():
+    async def run():
+        server = bench.MockServer(bench.MockServerConfig(ttft_ms=1.0, itl_ms=1000.0))
+        url = await server.start()
+        try:
+            config = bench.BenchConfig(url=url, model="mock-model", max_tokens=10, timeout=0.3)
+            return await bench.run_request(config, "hello", 1)
+        finally:
+            await server.stop()
+
+    result = asyncio.run(run())
+    assert result.error is not None and result.error.startswith("TimeoutError")
+    assert result.latency < 2.0
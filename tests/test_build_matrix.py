@@ -0,0 +1,54 @@
+"""CI build matrix computed from a small catalog."""
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CONFIG = """
+models:
+  converted:
+    name: "Converted"
+    model_gguf_url: "hf://org/repo/converted-Q4_K_M.gguf"
+  prebuilt:
+    name: "Prebuilt"
+    model_source: "prebuilt-source"
+defaults:
+  maintainer: "Test"
+"""
+
+
+def make_generator(generator, tmp_path):
+    config_path = tmp_path / "models.yaml"
+    config_path.write_text(CONFIG)
+    return generator.ModelGenerator(str(config_path), str(REPO_ROOT))
+
+
+def test_model_without_gguf_url_gets_no_source_build(generator, tmp_path):
+    matrix = make_generator(generator, tmp_path).build_matrix(base_digest="sha256:base")
+    assert [m['key'] for m in matrix['models']['include']] == ['converted', 'prebuilt']
+    assert [s['key'] for s in matrix['sources']['include']] == ['converted']
+    prebuilt = matrix['models']['include'][1]
+    assert prebuilt['model_source'] == 'prebuilt-source'
+    assert prebuilt['model_gguf_url'] == ''
+
+
+def test_previous_state_skips_unchanged_models(generator, tmp_path):
+    first = make_generator(generator, tmp_path).build_matrix(base_digest="sha256:base")
+    again = make_generator(generator, tmp_path).build_matrix(base_digest="sha256:base", previous=first['state'])
+    assert again['models']['include'] == []
+    assert again['sources']['include'] == []
+    rebased = make_generator(generator, tmp_path).build_matrix(base_digest="sha256:new", previous=first['state'])
+    assert len(rebased['models']['include']) == 2
+    assert rebased['sources']['include'] == []
+
+
+def test_unbaked_model_only_builds_its_source(generator, make_generator):
+    gen = make_generator(CONFIG.replace('    name: "Converted"\n',
+                                        '    name: "Converted"\n    weights:\n      mode: image_volume\n'))
+    matrix = gen.build_matrix(base_digest="sha256:base")
+    assert [m['key'] for m in matrix['models']['include']] == ['prebuilt']
+    assert [s['key'] for s in matrix['sources']['include']] == ['converted']
+    assert matrix['state']['models']['converted'] == {'source': matrix['sources']['include'][0]['fingerprint']}
+    again = make_generator(CONFIG).build_matrix(base_digest="sha256:base", previous=matrix['state'])
+    assert [m['key'] for m in again['models']['include']] == ['converted']
+    assert again['sources']['include'] == []
@@ -0,0 +1,46 @@
+"""Fitting llama-server's thread count to the pod's CPU allotment."""
+
+import pytest
+
+
+@pytest.mark.parametrize("config, allotment", [
+    ({}, None),
+    ({'resources': {'requests': {'cpu': "2"}}}, 2),
+    ({'resources': {'requests': {'cpu': "2"}, 'limits': {'cpu': "3500m"}}}, 3),
+    ({'resources': {'limits': {'cpu': "500m"}}}, 1),
+    ({'cpu': {'performance': True}, 'resources': {'limits': {'cpu': "3500m"}}}, 4),
+    ({'cpu': {'performance': True, 'cores': 6}, 'resources': {'limits': {'cpu': "2"}}}, 6),
+    ({'cpu': {'performance': True}}, 1),
+])
+def test_cpu_allotment(generator, config, allotment):
+    assert generator.cpu_allotment(config) == allotment
+
+
+@pytest.mark.parametrize("threads, expected", [(14, 4), (-1, 4), (2, 2), (None, 4)])
+def test_size_cpu_caps_threads(generator, threads, expected):
+    params = {} if threads is None else {'threads': threads}
+    sized = generator.size_cpu({'parameters': params, 'resources': {'limits': {'cpu': "4"}}})
+    assert sized['parameters']['threads'] == expected
+
+
+def test_size_cpu_without_cpu_keeps_threads(generator):
+    assert generator.size_cpu({'parameters': {'threads': 14}})['parameters'] == {'threads': 14}
+
+
+def test_performance_mode_is_guaranteed_qos(generator):
+    sized = generator.size_cpu({
+        'cpu': {'performance': True},
+        'parameters': {'threads': 14},
+        'resources': {'requests': {'cpu': "2", 'memory': "4Gi"}, 'limits': {'cpu': "3500m", 'memory': "6Gi"}},
+    })
+    assert sized['parameters']['threads'] == 4
+    assert sized['resources']['requests'] == sized['resources']['limits'] == {'cpu': "4", 'memory': "6Gi"}
+
+
+def test_threads_over_the_allotment_warn(make_generator, capsys):
+    spec = make_generator(
+        "models:\n  m:\n    name: \"M\"\n    parameters:\n      threads: 8\n"
+        "    resources:\n      requests:\n        cpu: \"2\"\n      limits:\n        cpu: \"2\"\n"
+    ).load_catalog()['m']
+    assert spec.config['parameters']['threads'] == 2
+    assert "models.m.parameters.threads (8) does not fit the pod's CPU allotment; using 2" in capsys.readouterr().err
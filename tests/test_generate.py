@@ -0,0 +1,82 @@
+"""End-to-end runs of generate-from-config.py against a copy of the repo's scripts."""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CONFIG = """
+defaults:
+  maintainer: "Test"
+models:
+  first:
+    name: "First"
+    model_gguf_url: "hf://org/repo/first-Q4_K_M.gguf"
+  second:
+    name: "Second"
+    model_gguf_url: "hf://org/repo/second-Q4_K_M.gguf"
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    shutil.copytree(REPO_ROOT / "scripts", tmp_path / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "models.yaml").write_text(CONFIG)
+    return tmp_path
+
+
+def run(repo, *args):
+    return subprocess.run([sys.executable, str(repo / "scripts" / "generate-from-config.py"),
+                           "--repo-root", str(repo), *args], capture_output=True, text=True)
+
+
+def outputs(repo, model):
+    return sorted(p for p in (repo / "k8s" / "models" / model).iterdir())
+
+
+def test_check_fails_on_stale_output(repo):
+    assert run(repo).returncode == 0
+    assert run(repo, "--check").returncode == 0
+
+    kustomization = repo / "k8s" / "models" / "first" / "kustomization.yaml"
+    kustomization.write_text(kustomization.read_text() + "# edited by hand\n")
+    result = run(repo, "--check")
+    assert result.returncode == 1
+    assert f"Stale: {kustomization}" in result.stdout
+    assert kustomization.read_text().endswith("# edited by hand\n")
+
+
+@pytest.mark.parametrize("args, summary", [
+    ((), "Generated files for 2 models (0 files written)"),
+    (("--incremental",), "Skipped 2 unchanged models"),
+])
+def test_second_run_writes_nothing(repo, args, summary):
+    assert run(repo).returncode == 0
+    mtimes = {p: p.stat().st_mtime_ns for p in outputs(repo, "first") + outputs(repo, "second")}
+
+    result = run(repo, *args)
+    assert result.returncode == 0
+    assert summary in result.stdout
+    assert "Generated: " not in result.stdout
+    assert {p: p.stat().st_mtime_ns for p in mtimes} == mtimes
+
+
+def test_removed_model_outputs_are_deleted(repo):
+    assert run(repo).returncode == 0
+    removed = outputs(repo, "second")
+    assert removed
+
+    (repo / "models" / "models.yaml").write_text(CONFIG.split("  second:")[0])
+    check = run(repo, "--check")
+    assert check.returncode == 1
+    assert all(f"Orphaned: {p}" in check.stdout for p in removed)
+
+    result = run(repo)
+    assert result.returncode == 0
+    assert not any(p.exists() for p in removed)
+    assert run(repo, "--check").returncode == 0
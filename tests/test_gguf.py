@@ -0,0 +1,109 @@
+"""GGUF header parsing and sizing against small synthetic files."""
+
+import struct
+
+import pytest
+
+
+def _string(text: str) -> bytes:
+    data = text.encode()
+    return struct.pack('<Q', len(data)) + data
+
+
+def _kv(key: str, value_type: int, payload: bytes) -> bytes:
+    return _string(key) + struct.pack('<I', value_type) + payload
+
+
+def write_gguf(path, metadata=None, tensors=((4096, 32),), weights=b'\0' * 64):
+    """Write a minimal GGUF v3 file; ``metadata`` maps key -> (type, packed value)."""
+    if metadata is None:
+        metadata = {
+            'general.architecture': (8, _string('llama')),
+            'general.file_type': (4, struct.pack('<I', 15)),
+            'llama.block_count': (4, struct.pack('<I', 4)),
+            'llama.attention.head_count': (4, struct.pack('<I', 8)),
+            'llama.attention.head_count_kv': (4, struct.pack('<I', 2)),
+            'llama.embedding_length': (4, struct.pack('<I', 512)),
+            'llama.context_length': (4, struct.pack('<I', 8192)),
+            # Skipped array of strings, as in tokenizer.ggml.tokens
+            'tokenizer.ggml.tokens': (9, struct.pack('<IQ', 8, 2) + _string('a') + _string('b')),
+        }
+    body = b'GGUF' + struct.pack('<IQQ', 3, len(tensors), len(metadata))
+    for key, (value_type, payload) in metadata.items():
+        body += _kv(key, value_type, payload)
+    for i, dims in enumerate(tensors):
+        body += _string(f"blk.{i}.weight") + struct.pack('<I', len(dims))
+        body += b''.join(struct.pack('<Q', d) for d in dims)
+        body += struct.pack('<IQ', 12, 0)
+    body += b'\0' * (-len(body) % 32)
+    path.write_bytes(body + weights)
+    return path
+
+
+def test_reads_header(generator, tmp_path):
+    info = generator.read_gguf_header(write_gguf(tmp_path / "model.gguf"))
+    assert info.architecture == 'llama'
+    assert info.block_count == 4
+    assert info.head_count == 8
+    assert info.head_count_kv == 2
+    assert info.key_length == info.value_length == 64  # embedding_length / head_count
+    assert info.context_length == 8192
+    assert info.parameter_count == 4096 * 32
+    assert info.weights_bytes == 64
+
+
+@pytest.mark.parametrize("file_type, name", [(15, 'Q4_K_M'), (7, 'Q8_0'), (1, 'F16'), (999, '999')])
+def test_file_type_names(generator, tmp_path, file_type, name):
+    metadata = {
+        'general.architecture': (8, _string('qwen3')),
+        'general.file_type': (4, struct.pack('<I', file_type)),
+    }
+    info = generator.read_gguf_header(write_gguf(tmp_path / "model.gguf", metadata))
+    assert info.file_type == name
+
+
+def test_per_layer_kv_heads_use_the_largest(generator, tmp_path):
+    metadata = {
+        'general.architecture': (8, _string('gemma3')),
+        'gemma3.attention.head_count': (4, struct.pack('<I', 8)),
+        'gemma3.attention.head_count_kv': (9, struct.pack('<IQ', 4, 3) + struct.pack('<3I', 1, 4, 2)),
+    }
+    info = generator.read_gguf_header(write_gguf(tmp_path / "model.gguf", metadata))
+    assert info.head_count_kv == 4
+
+
+def test_kv_cache_bytes(generator, tmp_path):
+    info = generator.read_gguf_header(write_gguf(tmp_path / "model.gguf"))
+    # 4 layers * 1024 tokens * 2 KV heads * (64 + 64) dims * 2 bytes (f16)
+    assert generator.kv_cache_bytes(info, 1024) == 4 * 1024 * 2 * 128 * 2
+    assert generator.kv_cache_bytes(info, 1024, 'q8_0', 'q8_0') == int(4 * 1024 * 2 * 128 * 34 / 32)
+
+
+def test_size_model_clamps_context_and_keeps_explicit_parameters(generator, tmp_path):
+    info = generator.read_gguf_header(write_gguf(tmp_path / "model.gguf"))
+    sized = generator.size_model(info, {
+        'parameters': {'ctx_size': 32768, 'threads': 3, 'cache_reuse': 0},
+        'resources': {'limits': {'cpu': '8'}},
+    })
+    assert sized['parameters'] == {'ctx_size': 8192, 'threads': 3, 'cache_reuse': 0}
+
+    derived = generator.size_model(info, {'resources': {'limits': {'cpu': '8'}}})
+    assert derived['parameters']['threads'] == 8
+    assert derived['parameters']['cache_reuse'] == 256
+    assert generator.parse_memory(derived['resources']['limits']['memory']) >= \
+        generator.parse_memory(derived['resources']['requests']['memory'])
+
+
+def test_invalid_magic(generator, tmp_path):
+    path = tmp_path / "model.gguf"
+    path.write_bytes(b'GGML' + b'\0' * 32)
+    with pytest.raises(generator.GGUFError, match="not a GGUF file"):
+        generator.read_gguf_header(path)
+
+
+@pytest.mark.parametrize("cut", [6, 30, 80, -70])
+def test_truncated_header(generator, tmp_path, cut):
+    path = write_gguf(tmp_path / "model.gguf", weights=b'')
+    path.write_bytes(path.read_bytes()[:cut])
+    with pytest.raises(generator.GGUFError):
+        generator.read_gguf_header(path)
@@ -0,0 +1,40 @@
+"""Merging defaults, templates and models without sharing nested dicts between models."""
+
+import copy
+
+CONFIG = """
+defaults:
+  parameters:
+    temp: 0.7
+    top_k: 40
+  resources:
+    requests:
+      memory: "4Gi"
+      cpu: "2"
+    limits:
+      memory: "8Gi"
+      cpu: "4"
+models:
+  a:
+    name: "A"
+    resources:
+      requests:
+        memory: "6Gi"
+  b:
+    name: "B"
+    parameters:
+      temp: 0.2
+"""
+
+
+def test_nested_overrides_do_not_leak_between_models(make_generator):
+    gen = make_generator(CONFIG)
+    defaults = copy.deepcopy(gen.config['defaults'])
+    catalog = gen.load_catalog()
+    a, b = catalog['a'].config, catalog['b'].config
+
+    assert a['resources']['requests'] == {'memory': "6Gi", 'cpu': "2"}
+    assert a['parameters']['temp'] == 0.7
+    assert b['resources']['requests'] == {'memory': "4Gi", 'cpu': "2"}
+    assert (b['parameters']['temp'], b['parameters']['top_k']) == (0.2, 40)
+    assert gen.config['defaults'] == defaults
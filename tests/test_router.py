@@ -0,0 +1,98 @@
+"""Routing decisions and proxying against the mock llama-server."""
+
+import asyncio
+import json
+
+import bench
+import router
+
+
+def make_router(replicas=3, **routing):
+    routes = {'models': {'m': {'hosts': [], 'routing': {'mode': 'prefix_hash', **routing}}}, 'default': 'm'}
+    r = router.Router(routes, router.RouterOptions())
+    model = r.models['m']
+    for i in range(replicas):
+        replica = router.Replica('m', f"10.0.0.{i}", 8080)
+        model.replicas[replica.key] = replica
+    return r, model
+
+
+def test_prefix_sticks_to_its_owner():
+    r, model = make_router()
+    first = r.pick_prefix([model], set(), "system: you are a helpful assistant")
+    for _ in range(5):
+        assert r.pick_prefix([model], set(), "system: you are a helpful assistant") is first
+    assert model.stats.prefix_owner == 6
+    assert model.stats.prefix_spilled == 0
+
+
+def test_prefixes_spread_over_replicas():
+    r, model = make_router()
+    owners = {r.pick_prefix([model], set(), f"prompt {i}").key for i in range(100)}
+    assert owners == set(model.replicas)
+
+
+def test_bounded_load_spills_from_busy_owner():
+    r, model = make_router(load_factor=1.25)
+    owner = r.pick_prefix([model], set(), "shared prefix")
+    # capacity = ceil(1.25 * (8 + 1) / 3) = 4, so an owner with 8 in flight is full
+    owner.in_flight = 8
+    spilled = r.pick_prefix([model], set(), "shared prefix")
+    assert spilled is not owner
+    assert model.stats.prefix_spilled == 1
+    owner.in_flight = 0
+    assert r.pick_prefix([model], set(), "shared prefix") is owner
+
+
+def test_unavailable_owner_is_skipped():
+    r, model = make_router()
+    owner = r.pick_prefix([model], set(), "shared prefix")
+    owner.healthy = False
+    assert r.pick_prefix([model], set(), "shared prefix") is not owner
+    assert r.pick_prefix([model], {k for k in model.replicas if k != owner.key}, "shared prefix") is owner
+
+
+def test_least_latency_prefers_fast_idle_replica():
+    r, model = make_router()
+    slow, fast, busy = model.replicas.values()
+    slow.ewma_ms, fast.ewma_ms, busy.ewma_ms = 500.0, 100.0, 100.0
+    busy.in_flight = 3
+    assert r.pick([model], set()) is fast
+
+
+def test_failed_replica_is_ejected_then_retried_last():
+    r, model = make_router(replicas=2)
+    bad, good = model.replicas.values()
+    bad.fail(eject_seconds=30)
+    assert r.pick([model], set()) is good
+    assert r.pick([model], {good.key}) is bad
+    assert r.pick([model], {good.key, bad.key}) is None
+
+
+def test_proxy_to_mock_and_unknown_model():
+    async def run():
+        server = bench.MockServer(bench.MockServerConfig(ttft_ms=1.0, itl_ms=1.0))
+        backend = await server.start()
+        port = int(backend.rsplit(':', 1)[1].split('/')[0])
+        proxy = router.Router({'models': {'mock-model': {'hosts': [f"127.0.0.1:{port}"]}}, 'default': 'mock-model'},
+                              router.RouterOptions(health_interval=60, resolve_interval=60))
+        router_port = await proxy.start('127.0.0.1', 0)
+        url = f"http://127.0.0.1:{router_port}/v1"
+        try:
+            ok = await bench.http_request(url, 'POST', '/chat/completions', {
+                'model': 'mock-model', 'max_tokens': 3, 'messages': [{'role': 'user', 'content': 'hi'}]})
+            missing = await bench.http_request(url, 'POST', '/chat/completions', {
+                'model': 'no-such-model', 'messages': [{'role': 'user', 'content': 'hi'}]})
+            streamed = await bench.run_request(bench.BenchConfig(url=url, model='mock-model', max_tokens=4), 'hi', 1)
+            return ok, missing, streamed, proxy.status()
+        finally:
+            await proxy.stop()
+            await server.stop()
+
+    (ok_status, ok_body), (missing_status, missing_body), streamed, status = asyncio.run(run())
+    assert ok_status == 200
+    assert json.loads(ok_body)['usage']['completion_tokens'] == 3
+    assert missing_status == 404
+    assert json.loads(missing_body)['error']['code'] == 'model_not_found'
+    assert streamed.error is None and streamed.completion_tokens == 4
+    assert 'mock-model' in status['models']
@@ -0,0 +1,60 @@
+"""Memory for parallel slots, whichever of a profile or the model's parameters sets them."""
+
+import pytest
+
+PROFILES = """
+serving_profiles:
+  throughput:
+    parallel: 4
+    extra_memory_per_slot: "1Gi"
+defaults:
+  parameters:
+    ctx_size: 8192
+  resources:
+    requests:
+      memory: "4Gi"
+    limits:
+      memory: "8Gi"
+"""
+
+
+def model(body: str) -> str:
+    return "models:\n  m:\n    name: \"M\"\n" + body + PROFILES
+
+
+def memory(generator, spec):
+    return spec.config['resources']['requests']['memory'], spec.config['resources']['limits']['memory']
+
+
+def test_parallel_in_parameters_without_estimate_is_rejected(generator, make_generator):
+    with pytest.raises(generator.ConfigError) as e:
+        make_generator(model("    parameters:\n      parallel: 4\n")).load_catalog()
+    assert "models.m serves 4 parallel slots" in e.value.errors[0]
+    assert "sizing.extra_memory_per_slot" in e.value.errors[0]
+
+
+def test_parallel_in_parameters_grows_memory_per_extra_slot(generator, make_generator):
+    gen = make_generator(model("    parameters:\n      parallel: 4\n"
+                               "    sizing:\n      extra_memory_per_slot: \"2Gi\"\n"))
+    spec = gen.load_catalog()['m']
+    assert memory(generator, spec) == ("10Gi", "14Gi")
+    kustomization, _ = gen.generate_k8s_kustomization('m', spec.config)
+    assert "CTX_SIZE=32768" in kustomization
+    assert "PARALLEL=4" in kustomization
+
+
+def test_profile_estimate_covers_a_parallel_override(generator, make_generator):
+    spec = make_generator(model("    serving_profile: throughput\n"
+                                "    parameters:\n      parallel: 2\n")).load_catalog()['m']
+    assert memory(generator, spec) == ("5Gi", "9Gi")
+
+
+def test_single_slot_needs_no_estimate(generator, make_generator):
+    spec = make_generator(model("    parameters:\n      parallel: 1\n")).load_catalog()['m']
+    assert memory(generator, spec) == ("4Gi", "8Gi")
+
+
+def test_invalid_estimate(generator, make_generator):
+    with pytest.raises(generator.ConfigError) as e:
+        make_generator(model("    sizing:\n      extra_memory_per_slot: \"lots\"\n")).load_catalog()
+    assert "sizing.extra_memory_per_slot is not a valid quantity" in e.value.errors[0]
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+import sweep
+from test_gguf import write_gguf
+
+
+def test_coordinate_search_starts_from_the_deployed_settings():
+    measured = []
+
+    async def run(params):
+        measured.append(params)
+        summary = {'output_tokens_per_s': params['parallel'], 'errors': 0}
+        return sweep.Candidate(params=params, report={'summary': summary})
+
+    current = {'threads': 6, 'ctx_size': 4096, 'cache_reuse': 256, 'parallel': 1, 'batch_size': 2048}
+    space = dict({d: [current[d]] for d in sweep.DIMENSIONS}, threads=[2, 4], parallel=[1, 2])
+    asyncio.run(sweep.coordinate_search(space, dict(current), run))
+    assert measured[0] == current
+
+
+@pytest.mark.parametrize("limit, fits", [("4Gi", True), ("512Mi", False)])
+def test_memory_shortfall(generator, tmp_path, limit, fits):
+    gguf = write_gguf(tmp_path / "model.gguf")
+    merged = {'parameters': {'ctx_size': 1024}, 'serving': {'parallel': 2},
+              'resources': {'limits': {'memory': limit}}}
+    shortfall = sweep.memory_shortfall(generator, merged, str(gguf))
+    assert (shortfall is None) == fits
+    if not fits:
+        assert "2 slot(s) of ctx_size 1024" in shortfall and "512Mi" in shortfall
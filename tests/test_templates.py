@@ -0,0 +1,31 @@
+"""Strict {{VAR}} templates and the mtime-keyed template cache."""
+
+import os
+
+import pytest
+
+
+def test_undefined_variable_raises(generator):
+    template = generator.Template("t.yaml", "name: {{NAME}}\nimage: {{IMAGE}}\n")
+    assert template.variables == {"NAME", "IMAGE"}
+    with pytest.raises(generator.TemplateError, match=r"'t.yaml' references undefined variables: IMAGE"):
+        template.render({"NAME": "m"})
+
+
+def test_lenient_render_leaves_undefined_variables_empty(generator):
+    template = generator.Template("t.yaml", "name: {{NAME}}\nimage: {{IMAGE}}\n")
+    assert template.render({"NAME": "m"}, strict=False) == "name: m\nimage: \n"
+
+
+def test_cache_recompiles_a_changed_template(generator, tmp_path):
+    path = tmp_path / "t.yaml"
+    path.write_text("{{A}}")
+    cache = generator.TemplateCache(tmp_path)
+    first = cache.get("t.yaml")
+    assert cache.get("t.yaml") is first
+
+    path.write_text("{{B}}")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    assert cache.get("t.yaml").variables == {"B"}
+    with pytest.raises(generator.TemplateError, match="Failed to load template 'missing.yaml'"):
+        cache.get("missing.yaml")
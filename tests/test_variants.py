@@ -0,0 +1,61 @@
+"""Quantization variants expanded from a base model."""
+
+import pytest
+import yaml
+
+BASE = """
+models:
+  m:
+    name: "M"
+    description: "M in Q4_K_M"
+    model_gguf_url: "hf://org/repo/M-Q4_K_M.gguf"
+    model_file: "/mnt/models/M-Q4_K_M.gguf"
+    model_source: "m-source"
+    resources:
+      requests:
+        memory: "4Gi"
+      limits:
+        memory: "8Gi"
+"""
+
+
+def test_variants_copy_the_base_with_the_quant_swapped(generator, make_generator):
+    catalog = make_generator(BASE + "    variants:\n      - Q8_0\n      - Q3_K_M\n").load_catalog()
+    assert list(catalog) == ['m', 'm-q8-0', 'm-q3-k-m']
+    q8 = catalog['m-q8-0'].config
+    assert q8['name'] == "M Q8_0"
+    assert q8['description'] == "M in Q8_0"
+    assert q8['model_gguf_url'] == "hf://org/repo/M-Q8_0.gguf"
+    assert q8['model_file'] == "/mnt/models/M-Q8_0.gguf"
+    assert q8['model_source'] == "m-source-q8-0"
+    # Scaled by bits per weight; smaller quants keep the base's memory
+    assert generator.parse_memory(q8['resources']['requests']['memory']) > generator.parse_memory("4Gi")
+    assert catalog['m-q3-k-m'].config['resources']['requests']['memory'] == "4Gi"
+
+
+def test_variant_settings_win(make_generator):
+    catalog = make_generator(BASE + "    variants:\n      - quant: Q8_0\n        resources:\n"
+                                    "          requests:\n            memory: \"5Gi\"\n").load_catalog()
+    assert catalog['m-q8-0'].config['resources']['requests']['memory'] == "5Gi"
+
+
+def test_variant_service_groups_the_base_and_its_variants(make_generator):
+    gen = make_generator(BASE + "    variants: [Q8_0]\n    variant_service: true\n")
+    catalog = gen.load_catalog()
+    assert {key: spec.config.get('variant_group') for key, spec in catalog.items()} == {'m': "m", 'm-q8-0': "m"}
+    _, service = gen.generate_variant_service('m', catalog['m'].config)
+    service = yaml.safe_load(service)
+    assert service['metadata']['name'] == "m-variants"
+    assert service['spec']['selector'] == {'ramalama.io/variant-group': "m"}
+
+
+@pytest.mark.parametrize("variants, error", [
+    ("      - Q4_K_M\n", "expands to models.m-q4-k-m, which already exists"),
+    ("      - [Q8_0]\n", "must be a quant name or a mapping with a quant"),
+    ("      - quant: Q8_0\n        variants: [Q6_K]\n", "variants cannot be set on a variant"),
+])
+def test_invalid_variants(generator, make_generator, variants, error):
+    config = BASE + "    variants:\n" + variants + "  m-q4-k-m:\n    name: \"Other\"\n"
+    with pytest.raises(generator.ConfigError) as e:
+        make_generator(config).load_catalog()
+    assert error in "\n".join(e.value.errors)
@@ -0,0 +1,35 @@
+"""node_cache weights: only the prefetch DaemonSet writes the root-owned cache."""
+
+import pytest
+import yaml
+
+NODE_CACHE = """
+models:
+  m:
+    name: "M"
+    model_gguf_url: "hf://org/repo/m.gguf"
+    weights:
+      mode: node_cache
+"""
+
+
+def test_node_cache_without_prefetch_is_rejected(generator, make_generator):
+    with pytest.raises(generator.ConfigError) as e:
+        make_generator(NODE_CACHE + "      prefetch: false\n").load_catalog()
+    assert "models.m.weights.prefetch cannot be false for node_cache" in e.value.errors[0]
+
+
+def test_only_the_prefetch_daemonset_writes_as_root(make_generator):
+    gen = make_generator(NODE_CACHE)
+    spec = gen.load_catalog()['m']
+    kustomization, _ = gen.generate_k8s_kustomization('m', spec.config)
+    assert "- weights-prefetch.yaml" in kustomization
+    assert "runAsUser" not in kustomization
+    assert "name: wait-for-weights" in kustomization
+
+    account, binding, daemonset = yaml.safe_load_all(gen.generate_weights_prefetch('m', spec.config))
+    assert binding['roleRef']['name'] == "system:openshift:scc:hostmount-anyuid"
+    assert binding['subjects'] == [{'kind': 'ServiceAccount', 'name': account['metadata']['name']}]
+    pod = daemonset['spec']['template']['spec']
+    assert pod['serviceAccountName'] == account['metadata']['name']
+    assert pod['initContainers'][0]['securityContext'] == {'runAsUser': 0}